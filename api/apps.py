@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self) -> None:
+        """Registers signal receivers."""
+        from api import signals  # noqa: F401, WPS433
@@ -0,0 +1,140 @@
+"""Asyncio version of the external services call.
+
+async_services.py
+"""
+import asyncio
+import json
+from abc import ABC
+from decimal import Decimal
+from typing import Any, AsyncGenerator, Dict
+
+import aiohttp
+from django.conf import settings
+from rest_framework import exceptions, status
+
+
+class AsyncSessionPool(object):
+    """Keep-alive aiohttp sessions shared by the async services of a process.
+
+    aiohttp sessions are bound to the event loop that created them, so each
+    loop gets its own session. A session is closed on its own loop when the
+    loop shuts down its async generators, as ``asyncio.run`` does, so
+    sessions of finished loops never leak their sockets.
+    """
+
+    def __init__(self) -> None:
+        """Async session pool constructor.
+        """
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._guards: Dict[asyncio.AbstractEventLoop, AsyncGenerator] = {}
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Get the session of the running loop, creating it when needed.
+
+        :return: an aiohttp client session
+        """
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            self._forget_closed_loops()
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=settings.EXTERNAL_API_POOL_SIZE),
+                timeout=aiohttp.ClientTimeout(
+                    connect=settings.EXTERNAL_API_CONNECT_TIMEOUT,
+                    sock_read=settings.EXTERNAL_API_READ_TIMEOUT,
+                ),
+            )
+            self._sessions[loop] = session
+            guard = self._guards[loop] = self._close_on_shutdown(loop, session)
+            loop.create_task(guard.__anext__())  # noqa: WPS609
+
+        return session
+
+    async def close(self) -> None:
+        """Closes the session of the running loop.
+        """
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def _close_on_shutdown(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        session: aiohttp.ClientSession,
+    ) -> AsyncGenerator:
+        try:
+            yield
+        finally:
+            if self._sessions.get(loop) is session:
+                self._sessions.pop(loop)
+            self._guards.pop(loop, None)
+            await session.close()
+
+    def _forget_closed_loops(self) -> None:
+        for loop in [loop for loop in self._sessions if loop.is_closed()]:
+            self._sessions.pop(loop)
+            self._guards.pop(loop, None)
+
+
+async_session_pool = AsyncSessionPool()
+
+
+class AsyncBaseService(ABC):
+    """Base class for async services.
+    """
+
+    path: str = None
+
+    def __init__(self) -> None:
+        """Async base constructor.
+        """
+        self.headers: Dict = {
+            'x-api-key': settings.EXTERNAL_API_TOKEN,
+            'content-type': 'application/json',
+        }
+        self.url: str = '{0}/{1}'.format(settings.EXTERNAL_API_URL, self.path)
+
+    async def request(self, request_data: Dict) -> Dict[str, Any]:
+        """Do a url request.
+
+        :param request_data: A dictionary with request sended data
+        :raises APIException: raised when get unexpected response from server
+        :return: A dict with response data eg: {'score': 704}
+        """
+        session = async_session_pool.get_session()
+        try:
+            async with session.post(
+                self.url,
+                data=json.dumps(request_data),
+                headers=self.headers,
+            ) as response:
+                if response.status != status.HTTP_200_OK:
+                    raise exceptions.APIException('Unexpected response from server')
+
+                return dict(await response.json(content_type=None))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+            raise exceptions.APIException('Unable to reach server: {0}'.format(exception))
+
+
+class AsyncScoreService(AsyncBaseService):
+    """Async service for score calculation.
+    """
+
+    path = 'score'
+
+
+class AsyncCommitmentService(AsyncBaseService):
+    """Async service for commitment calculation.
+    """
+
+    path = 'commitment'
+
+    async def request(self, request_data: Dict) -> Dict[str, Any]:
+        """Do a url request.
+
+        :param request_data: A dictionary with request sended data
+        :return: A dict with response data eg: {'commitment': Decimal('0.12')}
+        """
+        response = await super().request(request_data)
+        response.update({'commitment': Decimal(response.get('commitment'))})
+        return response
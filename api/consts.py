@@ -5,7 +5,12 @@ from decimal import Decimal
 MIN_AMOUNT = Decimal('1000')
 MAX_AMOUNT = Decimal('4000')
 MIN_SCORE = 600
-VALID_DATE_FORMAT = '%Y-%m-%d'  # noqa: WPS323
 MINIMUM_AGE = 18
 
 MAX_RETRIES = 10
+
+CPF_CACHE_SIZE = 4096
+
+BULK_CREATE_BATCH_SIZE = 500
+AGE_POLICY_BATCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
@@ -7,12 +7,15 @@ from django.http.request import HttpRequest
 from rest_framework.status import HTTP_400_BAD_REQUEST
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from schema import Schema, SchemaError
 
+from api.schemas import CompiledSchema
 
-def validate_request_data(schema: Schema) -> Callable:
+
+def validate_request_data(schema: CompiledSchema) -> Callable:
     """Decorator for validate requrest parameters.
 
+    The converted payload is set on ``request.validated_data``.
+
     :param schema: a schema that will use for validation.
     :return: a callable wrapper
     """
@@ -22,13 +25,12 @@ def validate_request_data(schema: Schema) -> Callable:
             request: HttpRequest,
             *args: Any,
         ) -> Response:
-            request_data = dict(request.data.items())
             try:
-                schema.validate(request_data)
-            except (SchemaError, ValidationError) as exception:
+                request.validated_data = schema.validate(request.data)
+            except ValidationError as exception:
                 return Response(
                     status=HTTP_400_BAD_REQUEST,
-                    data={'errors': [str(exception)]},
+                    data={'errors': exception.messages},
                 )
 
             return func(view, request, *args)
@@ -45,6 +45,15 @@ class LoanResult(BaseEnum):
     refused = 'refused'
 
 
+class PipelineMode(BaseEnum):
+    """Enum of credit analysis pipeline modes.
+    """
+
+    chain = 'chain'
+    concurrent = 'concurrent'
+    fused = 'fused'
+
+
 # class LoanTerms(BaseEnum):
 #     """Enum of loan terms.
 #     """
@@ -0,0 +1,79 @@
+"""Loans export formats.
+
+exports.py
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterator, Mapping
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from api.helpers import convert_str_date_to_object
+from api.logic import EXPORT_LOAN_FIELDS
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_FILTERS = ('status', 'result', 'state')
+CSV_COLUMNS = EXPORT_LOAN_FIELDS + ('proposal_amount', 'proposal_terms', 'policies')
+
+
+class _Echo(object):
+    """File-like object that returns what is written, for streaming csv.
+    """
+
+    def write(self, line: str) -> str:
+        """Returns the written line.
+
+        :param line: a csv line
+        :return: the same line
+        """
+        return line
+
+
+def get_export_filters(params: Mapping[str, Any]) -> Dict[str, Any]:
+    """Converts export parameters into loan lookups.
+
+    :param params: a mapping with status, result, state, created_from and created_to
+    :raises ValueError: raised when a date is not on Y-m-d format
+    :return: a dict of loan lookups
+    """
+    filters = {name: params[name] for name in EXPORT_FILTERS if params.get(name)}
+    if params.get('created_from'):
+        created_from = convert_str_date_to_object(date=params['created_from'])
+        filters['created_at__gte'] = timezone.make_aware(datetime.combine(created_from, time.min))
+    if params.get('created_to'):
+        created_to = convert_str_date_to_object(date=params['created_to']) + timedelta(days=1)
+        filters['created_at__lt'] = timezone.make_aware(datetime.combine(created_to, time.min))
+
+    return filters
+
+
+def iter_ndjson(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """Yields a JSON line per row.
+
+    :param rows: loan rows
+    :yields: a JSON line
+    """
+    for row in rows:
+        yield '{0}\n'.format(json.dumps(row, cls=DjangoJSONEncoder))
+
+
+def iter_csv(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """Yields a header and a CSV line per row, policies as name:ok|name:failed.
+
+    :param rows: loan rows
+    :yields: a CSV line
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        proposal = row['proposal'] or {}
+        policies = '|'.join(
+            '{0}:{1}'.format(policy['name'], 'failed' if policy['failed'] else 'ok')
+            for policy in row['policies']
+        )
+        yield writer.writerow(
+            [row[field] for field in EXPORT_LOAN_FIELDS]
+            + [proposal.get('amount'), proposal.get('terms'), policies],
+        )
@@ -2,26 +2,95 @@
 
 helpers.py
 """
-from datetime import datetime
+import datetime
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
 
-from api.consts import VALID_DATE_FORMAT
+from api.consts import CPF_CACHE_SIZE
 
+_ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}', re.ASCII)
+_CPF_MASK = str.maketrans('', '', '.-')
+_CPF_FIRST_WEIGHTS = tuple(range(10, 1, -1))
+_CPF_SECOND_WEIGHTS = tuple(range(11, 1, -1))
 
-def convert_str_date_to_object(date: str) -> datetime:
-    """Convert date str to datetime object.
+
+def convert_str_date_to_object(date: str) -> datetime.date:
+    """Convert date str to date object.
+
+    Only the 'Y-m-d' format is accepted, with zero padded month and day.
 
     :param date: a str contains 'Y-m-d' date
-    :return: datetime object
+    :raises ValueError: raised when date is not a valid 'Y-m-d' date
+    :return: date object
     """
-    return datetime.strptime(date, VALID_DATE_FORMAT)
+    if _ISO_DATE.fullmatch(date) is None:
+        raise ValueError('{0!r} does not match format Y-m-d'.format(date))
 
+    return datetime.date(int(date[:4]), int(date[5:7]), int(date[8:]))
 
-def calculate_age_by_date(birthdate: datetime) -> int:
+
+def calculate_age_by_date(birthdate: datetime.date, today: Optional[datetime.date] = None) -> int:
     """Calculate age by birthdate.
 
-    :param birthdate: A datetime object containing birth date.
+    :param birthdate: A date object containing birth date.
+    :param today: the reference date, current date when None
     :return: return calculated age
     """
-    today = datetime.today()
+    if today is None:
+        today = datetime.date.today()
     diff = ((today.month, today.day) < (birthdate.month, birthdate.day))
     return today.year - birthdate.year - diff
+
+
+def calculate_ages(
+    birthdates: Iterable[datetime.date],
+    today: Optional[datetime.date] = None,
+) -> List[int]:
+    """Calculate the ages of many birthdates against a single reference date.
+
+    Each age is computed as in ``calculate_age_by_date``, one birthdate at a
+    time. The current date is read, and split into year and month-day, once
+    per call instead of once per birthdate.
+
+    :param birthdates: date objects containing birth dates.
+    :param today: the reference date, current date when None
+    :return: a list of ages, in the order of birthdates
+    """
+    if today is None:
+        today = datetime.date.today()
+    year, month_day = today.year, (today.month, today.day)
+    return [
+        year - birthdate.year - (month_day < (birthdate.month, birthdate.day))
+        for birthdate in birthdates
+    ]
+
+
+@lru_cache(maxsize=CPF_CACHE_SIZE)
+def is_valid_cpf(cpf: str) -> bool:
+    """Checks the check digits of a cpf, with or without mask.
+
+    Recent results are kept in a LRU, since the same cpf is checked by the
+    request schema and again by the model validator.
+
+    :param cpf: a str with 11 digits, eg: '26443567099' or '264.435.670-99'
+    :return: True when cpf is valid
+    """
+    if not (len(cpf) == 11 and cpf.isdigit()):  # noqa: WPS432
+        cpf = cpf.translate(_CPF_MASK)
+        if len(cpf) != 11 or not cpf.isdigit():  # noqa: WPS432
+            return False
+    digits = cpf.encode()
+    if len(digits) != 11 or cpf.count(cpf[0]) == 11:  # noqa: WPS432
+        return False
+
+    return (
+        _get_cpf_check_digit(digits, _CPF_FIRST_WEIGHTS) == digits[9] - 48  # noqa: WPS432
+        and _get_cpf_check_digit(digits, _CPF_SECOND_WEIGHTS) == digits[10] - 48  # noqa: WPS432
+    )
+
+
+def _get_cpf_check_digit(digits: bytes, weights: tuple) -> int:
+    total = sum((digit - 48) * weight for digit, weight in zip(digits, weights))  # noqa: WPS432
+    remainder = total * 10 % 11  # noqa: WPS432
+    return 0 if remainder == 10 else remainder  # noqa: WPS432
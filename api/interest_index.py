@@ -0,0 +1,170 @@
+"""Process-local index of interest rates.
+
+interest_index.py
+"""
+from bisect import bisect_right
+from decimal import Decimal
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from api.models import Interest
+
+VERSION_CACHE_KEY = 'api:interest_index:version'
+
+# (segment starts, segment percentages) where a None percentage is a gap.
+TermSegments = Tuple[List[int], List[Optional[Decimal]]]
+# ((terms, percentage), ...) sorted by terms, for a single score band.
+RateTable = Tuple[Tuple[int, Optional[Decimal]], ...]
+
+
+def _build_segments(rows: List[Tuple[int, int, Decimal]]) -> TermSegments:
+    """Flattens (possibly overlapping) score ranges into disjoint segments.
+
+    Each segment keeps the lowest percentage among the ranges covering it,
+    which mirrors the ``order_by('percentage')`` of the original query.
+
+    :param rows: a list of (min_score, max_score, percentage) of one term
+    :return: a tuple with sorted segment starts and their percentages
+    """
+    bounds = sorted({row[0] for row in rows} | {row[1] + 1 for row in rows})
+    starts: List[int] = []
+    percentages: List[Optional[Decimal]] = []
+    for start in bounds:
+        covering = [row[2] for row in rows if row[0] <= start <= row[1]]
+        starts.append(start)
+        percentages.append(min(covering) if covering else None)
+
+    return starts, percentages
+
+
+def _lookup(starts: List[int], values: List, score: int) -> Optional[object]:
+    position = bisect_right(starts, score) - 1
+    if position < 0:
+        return None
+
+    return values[position]
+
+
+class InterestSnapshot(object):
+    """Immutable view of the Interest table at a given version.
+    """
+
+    def __init__(self, segments: Dict[int, TermSegments]) -> None:
+        """Interest snapshot constructor.
+
+        :param segments: the score segments of each term
+        """
+        self.segments = segments
+        self.terms: List[int] = sorted(segments)
+        self.band_starts: List[int] = sorted({
+            start for starts, _ in segments.values() for start in starts
+        })
+        self.band_tables: List[RateTable] = [
+            tuple((terms, self.get_rate(band_start, terms)) for terms in self.terms)
+            for band_start in self.band_starts
+        ]
+
+    def get_rate(self, score: int, terms: int) -> Optional[Decimal]:
+        """Get the lowest interest rate for a score and amount of terms.
+
+        :param score: score represented by a integer
+        :param terms: a integer that represents amount of terms
+        :return: a decimal with interest rate or None when not found
+        """
+        segments = self.segments.get(terms)
+        if segments is None:
+            return None
+
+        return _lookup(segments[0], segments[1], score)  # type: ignore
+
+    def get_rate_table(self, score: int) -> RateTable:
+        """Get the rates of every term for a score.
+
+        :param score: score represented by a integer
+        :return: a tuple of (terms, percentage) sorted by terms
+        """
+        table = _lookup(self.band_starts, self.band_tables, score)
+        if table is None:
+            return tuple((terms, None) for terms in self.terms)
+
+        return table  # type: ignore
+
+
+class InterestIndex(object):
+    """Versioned, in-memory copy of the Interest table.
+
+    The table is loaded once per process and dropped whenever an Interest
+    is saved or deleted (see ``api.signals``). Other processes notice the
+    change through a version number kept on the default cache, bumped once
+    the change is committed so they never load uncommitted rows under it.
+    Queryset ``update()`` / ``bulk_create()`` do not send signals, so call
+    ``invalidate`` after committing them.
+    """
+
+    def __init__(self) -> None:
+        """Interest index constructor.
+        """
+        self._lock = Lock()
+        self._snapshot: Optional[InterestSnapshot] = None
+        self._version: Optional[int] = None
+
+    def drop(self) -> None:
+        """Drops the loaded table of current process only.
+        """
+        with self._lock:
+            self._snapshot = None
+
+    def invalidate(self) -> None:
+        """Drops the loaded table and bumps the shared version.
+        """
+        with self._lock:
+            self._snapshot = None
+            try:
+                cache.incr(VERSION_CACHE_KEY)
+            except ValueError:
+                cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+
+    def get_terms(self) -> List[int]:
+        """Get all registered terms.
+
+        :return: a sorted list of terms
+        """
+        return list(self.snapshot().terms)
+
+    def get_rate(self, score: int, terms: int) -> Optional[Decimal]:
+        """Get the lowest interest rate for a score and amount of terms.
+
+        :param score: score represented by a integer
+        :param terms: a integer that represents amount of terms
+        :return: a decimal with interest rate or None when not found
+        """
+        return self.snapshot().get_rate(score=score, terms=terms)
+
+    def snapshot(self) -> InterestSnapshot:
+        """Get the current snapshot, loading it when needed.
+
+        :return: an interest snapshot
+        """
+        version = cache.get(VERSION_CACHE_KEY)
+        with self._lock:
+            if self._snapshot is None or version != self._version:
+                self._snapshot = InterestSnapshot(self._load())
+                self._version = version
+
+            return self._snapshot
+
+    def _load(self) -> Dict[int, TermSegments]:
+        rows_by_terms: Dict[int, List[Tuple[int, int, Decimal]]] = {}
+        queryset = Interest.objects.values_list('terms', 'min_score', 'max_score', 'percentage')
+        for terms, min_score, max_score, percentage in queryset:
+            rows_by_terms.setdefault(terms, []).append((min_score, max_score, percentage))
+
+        return {
+            terms: _build_segments(rows)
+            for terms, rows in rows_by_terms.items()
+        }
+
+
+interest_index = InterestIndex()
@@ -3,45 +3,74 @@
 logic.py
 """
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
 from uuid import UUID
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db.models import Count
+from django.db import transaction
+from django.db.models import Model, Q
+from django.db.models.signals import post_save
 from rest_framework.exceptions import APIException
 
-from api.helpers import convert_str_date_to_object
-from api.enums import LoanPolicies
+from api.consts import BULK_CREATE_BATCH_SIZE, EXPORT_CHUNK_SIZE
+from api.enums import LoanPolicies, LoanStatus
+from api.helpers import calculate_ages
+from api.interest_index import InterestSnapshot, interest_index
 from api.models import (
-    Interest as InterestModel,
     Loan as LoanModel,
     Policy as PolicyModel,
     Proposal as ProposalModel,
 )
-from api.validators import validate_age, validate_score
-from api.services import CommitmentService, ScoreService
+from api.validators import validate_age, validate_minimum_age, validate_score
+from api.services import BaseService, BatchScoreService, CommitmentService, ScoreService
+from api.state_machine import (
+    PROCESSING_AGE_STATE,
+    PROCESSING_COMMITMENT_STATE,
+    PROCESSING_SCORE_STATE,
+)
+
+# Loan fields included on exports.
+EXPORT_LOAN_FIELDS = (
+    'id', 'name', 'cpf', 'birthdate', 'amount', 'terms', 'income', 'score', 'commitment',
+    'refused_policy', 'result', 'state', 'status', 'created_at',
+)
+
+# Loan fields written when a policy refuses or approves it.
+LOAN_DECISION_FIELDS = ('state', 'refused_policy', 'result', 'status')
+
+# State a loan must be on for each policy to run, any other state means it is done.
+POLICY_STATES = {
+    LoanPolicies.age.value: PROCESSING_AGE_STATE,
+    LoanPolicies.score.value: PROCESSING_SCORE_STATE,
+    LoanPolicies.commitment.value: PROCESSING_COMMITMENT_STATE,
+}
+
+# A response already fetched from an external service, or the error it raised.
+PolicyResponse = Union[Dict, APIException]
 
 
 def get_interest_rate(score: int, terms: int) -> Decimal:
     """Get rate by score and amount of terms.
 
+    Rates are read from the in-memory ``interest_index``, so no query is made
+    once the table has been loaded.
+
     :param score: score represented by a integer
     :param terms: a integer that represents amount of terms
     :raises ValueError: raise when not found interest
     :return: A decimal number with interest rate.
     """
-    interests = InterestModel.objects.filter(
-        min_score__lte=score,
-        max_score__gte=score,
-    ).filter(terms=terms).order_by('percentage')
-
-    if not interests:
+    percentage = interest_index.get_rate(score=score, terms=terms)
+    if percentage is None:
         raise ValueError('Interest rate not found!')
 
-    interest = interests[0]
-
-    return interest.percentage
+    return percentage
 
 
 def calculate_installment(amount: Decimal, terms: int, interest: Decimal) -> Decimal:
@@ -64,62 +93,213 @@ def get_all_terms() -> List:
     :raises ValueError: exception called when not found interest on database.
     :return: List of terms ids
     """
-    interests = InterestModel.objects.values('terms').annotate(qty_terms=Count('terms'))
-    if not interests:
+    terms = interest_index.get_terms()
+    if not terms:
         raise ValueError('Have no interest/terms registered!')
 
-    terms: List = []
-    for interest in interests:
-        terms.append(interest.get('terms'))
-
     return terms
 
 
-def get_proposal_terms(loan: LoanModel, commitment: Decimal) -> int:
-    """Retrieves new terms value if installment exceeds the commitment.
+def solve_proposal_terms(  # noqa: WPS211
+    snapshot: InterestSnapshot,
+    amount: Decimal,
+    income: Decimal,
+    score: int,
+    commitment: Decimal,
+    min_terms: int,
+) -> int:
+    """Finds the smallest term whose installment fits the commitment limit.
 
-    :param loan: a loan model object.
+    Works over the rate table of the score band, so every candidate term is
+    solved in one pass without touching the database.
+
+    :param snapshot: an interest snapshot
+    :param amount: loan amount value
+    :param income: loan income value
+    :param score: score represented by a integer
     :param commitment: percentage of commitment
+    :param min_terms: the smallest term accepted
+    :raises ValueError: raise when not found interest/terms
     :raises ValidationError: exception for no terms found for commitment rate
     :return: a integer that represents proposal term.
     """
-    limit_installment = loan.income - (loan.income * commitment)
-    all_terms = [terms for terms in get_all_terms() if terms >= loan.terms]
-    for terms in all_terms:
-        interest = get_interest_rate(score=loan.score, terms=terms)
-        installment = calculate_installment(
-            amount=loan.amount,
-            terms=terms,
-            interest=interest,
-        )
-        if installment <= limit_installment:
+    if not snapshot.terms:
+        raise ValueError('Have no interest/terms registered!')
+
+    limit_installment = income - (income * commitment)
+    for terms, interest in snapshot.get_rate_table(score):
+        if terms < min_terms:
+            continue
+        if interest is None:
+            raise ValueError('Interest rate not found!')
+        if calculate_installment(amount=amount, terms=terms, interest=interest) <= limit_installment:
             return terms
 
     raise ValidationError('No terms found for commitment rate!')
 
 
+def get_proposal_terms(loan: LoanModel, commitment: Decimal) -> int:
+    """Retrieves new terms value if installment exceeds the commitment.
+
+    :param loan: a loan model object.
+    :param commitment: percentage of commitment
+    :return: a integer that represents proposal term.
+    """
+    return solve_proposal_terms(
+        snapshot=interest_index.snapshot(),
+        amount=loan.amount,
+        income=loan.income,
+        score=loan.score,
+        commitment=commitment,
+        min_terms=loan.terms,
+    )
+
+
+def get_bulk_proposal_terms(loans: Iterable[LoanModel]) -> Dict[UUID, Optional[int]]:
+    """Retrieves proposal terms of many loans at once, for reprocessing jobs.
+
+    Every loan is solved against the same interest snapshot using its stored
+    score and commitment. Loans refused before score or commitment was
+    stored have no proposal.
+
+    :param loans: an iterable of loan model objects
+    :return: a dict of loan id and proposal term, None when no term fits
+    """
+    snapshot = interest_index.snapshot()
+    proposal_terms: Dict[UUID, Optional[int]] = {}
+    for loan in loans:
+        if loan.score is None or loan.commitment is None:
+            proposal_terms[loan.id] = None
+            continue
+        try:
+            proposal_terms[loan.id] = solve_proposal_terms(
+                snapshot=snapshot,
+                amount=loan.amount,
+                income=loan.income,
+                score=loan.score,
+                commitment=loan.commitment,
+                min_terms=loan.terms,
+            )
+        except (ValidationError, ValueError):
+            proposal_terms[loan.id] = None
+
+    return proposal_terms
+
+
+# The policy is only built here, it is inserted with the step outcome by _save_step.
 def _generate_policy(loan: LoanModel, policy_name: str) -> PolicyModel:
     policy = PolicyModel()
     policy.name = policy_name
     policy.response = json.dumps({})  # noqa: P103
     policy.loan = loan
-    policy.save()
+    loan.record_policy(policy_name, passed=True)
     return policy
 
 
+def is_policy_pending(loan: LoanModel, policy_name: str) -> bool:
+    """Checks if a policy still has to run on a loan.
+
+    A policy step moves the loan out of the state of that policy, so a
+    redelivered or replayed step is skipped before any upstream call.
+
+    :param loan: a loan model object
+    :param policy_name: name of policy
+    :return: True when the loan is on the state of the policy
+    """
+    return loan.state == POLICY_STATES[policy_name]
+
+
+# Writes a policy step as one atomic unit: the loan UPDATE is conditioned on the state
+# of the policy, so only one of concurrent deliveries of a (loan, policy) step writes
+# its Policy row; the others reload the loan as left by the winner. Failures are
+# always logged, they do not move the loan.
+def _save_step(policy: PolicyModel, loan_fields: Tuple[str, ...], *inserts: Model) -> None:
+    loan = policy.loan
+    with transaction.atomic():
+        if loan_fields and not _update_step_loan(loan, POLICY_STATES[policy.name], loan_fields):
+            loan.refresh_from_db()
+            return
+
+        policy.save(force_insert=True)
+        for instance in inserts:
+            instance.save(force_insert=True)
+        if loan_fields:
+            _send_loan_post_save(loan, loan_fields)
+
+
+# Loans written with queryset updates skip post_save, which api.signals relies on.
+def _send_loan_post_save(loan: LoanModel, loan_fields: Tuple[str, ...]) -> None:
+    post_save.send(
+        sender=LoanModel,
+        instance=loan,
+        created=False,
+        update_fields=frozenset(loan_fields),
+        raw=False,
+        using=loan._state.db,  # noqa: WPS437
+    )
+
+
+def _update_step_loan(loan: LoanModel, from_state: str, loan_fields: Tuple[str, ...]) -> bool:
+    return bool(LoanModel.objects.filter(pk=loan.pk, state=from_state).update(
+        **{field: getattr(loan, field) for field in loan_fields},
+    ))
+
+
 def _handle_api_exception(policy: PolicyModel, api_exception: APIException) -> None:
     policy.response = json.dumps({'error': str(api_exception)})
     policy.failed = True
-    policy.save()
+    policy.loan.record_policy(policy.name, passed=False)
+    _save_step(policy, ())
 
 
 def _handle_validation_error(policy: PolicyModel, error: ValidationError) -> None:
     policy.response = json.dumps({'error': str(error)})
-    policy.save()
     loan = policy.loan
     loan.refused_policy = policy.name
     loan.refuse()
-    loan.save()
+    _save_step(policy, LOAN_DECISION_FIELDS)
+
+
+def _request_service(
+    service_class: Type[BaseService],
+    loan: LoanModel,
+    prefetched: Optional[PolicyResponse],
+    deadline: Optional[float],
+) -> Dict:
+    if prefetched is None:
+        return service_class().request(request_data={'cpf': loan.cpf}, deadline=deadline)
+    if isinstance(prefetched, APIException):
+        raise prefetched
+
+    return prefetched
+
+
+def _get_score_service() -> Type[BaseService]:
+    if settings.EXTERNAL_API_SCORE_BATCH_WAIT > 0:
+        return BatchScoreService
+    return ScoreService
+
+
+def _fetch(service_class: Type[BaseService], cpf: str) -> PolicyResponse:
+    try:
+        return service_class().request(request_data={'cpf': cpf})
+    except APIException as api_exception:
+        return api_exception
+
+
+def fetch_score_and_commitment(cpf: str) -> Tuple[PolicyResponse, PolicyResponse]:
+    """Requests score and commitment services concurrently.
+
+    Each call gets its own threads, so concurrent tasks of threaded or green
+    worker pools never queue behind each other.
+
+    :param cpf: the cpf sent to both services
+    :return: a tuple with score and commitment responses or the APIException raised
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        score_future = executor.submit(_fetch, _get_score_service(), cpf)
+        commitment_future = executor.submit(_fetch, CommitmentService, cpf)
+        return score_future.result(), commitment_future.result()
 
 
 def start_age_policy(loan_id: str) -> LoanModel:
@@ -128,20 +308,75 @@ def start_age_policy(loan_id: str) -> LoanModel:
     :param loan_id: id of loan
     :return: A model object with loan registry
     """
-    loan = LoanModel.objects.get(pk=UUID(loan_id))
+    return run_age_policy(LoanModel.objects.get(pk=UUID(loan_id)))
+
+
+def run_age_policy(loan: LoanModel, today: Optional[date] = None) -> LoanModel:
+    """Runs the age check policy on a loaded loan.
+
+    :param loan: a loan model object
+    :param today: the reference date of a batch, current date when None
+    :return: A model object with loan registry
+    """
+    if not is_policy_pending(loan, LoanPolicies.age.value):
+        return loan
+
     policy = _generate_policy(loan, LoanPolicies.age.value)
     try:
-        validate_age(loan.birthdate)
+        validate_age(loan.birthdate, today=today)
     except ValidationError as error:
         _handle_validation_error(policy, error)
         return loan
 
     loan.process_age()
-    loan.save()
+    _save_step(policy, ('state',))
 
     return loan
 
 
+def start_age_policies(loan_ids: Iterable[str], today: Optional[date] = None) -> List[LoanModel]:
+    """Runs the age check policy on a batch of loans.
+
+    Loans still on the age state are locked and loaded in one query, their
+    ages are checked against a single reference date, and the policies and
+    loan changes are written with one bulk insert and one bulk update.
+    Loans past the age state are skipped.
+
+    :param loan_ids: ids of loans
+    :param today: the reference date of the batch, current date when None
+    :return: a list with the loans processed
+    """
+    with transaction.atomic():
+        loans = list(LoanModel.objects.select_for_update().filter(
+            pk__in=[UUID(str(loan_id)) for loan_id in loan_ids],
+            state=PROCESSING_AGE_STATE,
+        ))
+        ages = calculate_ages([loan.birthdate for loan in loans], today=today)
+        policies = []
+        for loan, age in zip(loans, ages):
+            policy = _generate_policy(loan, LoanPolicies.age.value)
+            try:
+                validate_minimum_age(age)
+            except ValidationError as error:
+                policy.response = json.dumps({'error': str(error)})
+                loan.refused_policy = policy.name
+                loan.refuse()
+            else:
+                loan.process_age()
+            policies.append(policy)
+
+        PolicyModel.objects.bulk_create(policies, batch_size=BULK_CREATE_BATCH_SIZE)
+        LoanModel.objects.bulk_update(
+            loans,
+            LOAN_DECISION_FIELDS,
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        for loan in loans:
+            _send_loan_post_save(loan, LOAN_DECISION_FIELDS)
+
+    return loans
+
+
 def get_loan(loan_id: UUID) -> LoanModel:
     """Get loan by id.
 
@@ -151,35 +386,193 @@ def get_loan(loan_id: UUID) -> LoanModel:
     return LoanModel.objects.get(pk=loan_id)
 
 
+def get_loan_detail_cache_key(loan_id: UUID) -> str:
+    """Get the cache key of a loan detail.
+
+    :param loan_id: UUID object
+    :return: a cache key
+    """
+    return 'api:loan_detail:{0}'.format(loan_id)
+
+
+def get_loan_detail(loan_id: UUID) -> Dict[str, Any]:
+    """Get loan detail with its proposal in one query, cached once completed.
+
+    Only completed details are cached: they never change, while a processing
+    detail read just before a step commits could be cached after it.
+
+    :param loan_id: UUID object
+    :raises DoesNotExist: raised when loan is not found
+    :return: A dict with loan detail
+    """
+    cache_key = get_loan_detail_cache_key(loan_id)
+    loan_detail = cache.get(cache_key)
+    if loan_detail is not None:
+        return loan_detail
+
+    loan_detail = LoanModel.objects.filter(pk=loan_id).values(
+        'id',
+        'status',
+        'result',
+        'refused_policy',
+        'proposal__amount',
+        'proposal__terms',
+    ).get()
+    loan_detail['amount'] = loan_detail.pop('proposal__amount')
+    loan_detail['terms'] = loan_detail.pop('proposal__terms')
+    if loan_detail['status'] == LoanStatus.completed.value:
+        cache.set(cache_key, loan_detail, timeout=settings.LOAN_DETAIL_CACHE_TTL)
+
+    return loan_detail
+
+
+def iter_loans_export(
+    filters: Dict[str, Any],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """Yields loans with their policies and proposal, in constant memory.
+
+    Loans are read through a server-side cursor and policies are fetched
+    with one query per chunk of loans.
+
+    :param filters: lookups of loan fields, eg: {'status': 'completed'}
+    :param chunk_size: rows fetched per round trip
+    :yields: a dict per loan
+    """
+    loans = LoanModel.objects.filter(**filters).order_by('created_at').values(
+        *EXPORT_LOAN_FIELDS,
+        'proposal__amount',
+        'proposal__terms',
+    ).iterator(chunk_size=chunk_size)
+    for chunk in _iter_chunks(loans, chunk_size):
+        policies: Dict[UUID, List[Dict]] = {}
+        chunk_policies = PolicyModel.objects.filter(
+            loan_id__in=[loan['id'] for loan in chunk],
+        ).order_by('id').values('loan_id', 'name', 'failed')
+        for policy in chunk_policies:
+            loan_id = policy.pop('loan_id')
+            policies.setdefault(loan_id, []).append(policy)
+
+        for loan in chunk:
+            proposal_amount = loan.pop('proposal__amount')
+            proposal_terms = loan.pop('proposal__terms')
+            loan['proposal'] = None if proposal_terms is None else {
+                'amount': proposal_amount,
+                'terms': proposal_terms,
+            }
+            loan['policies'] = policies.get(loan['id'], [])
+            yield loan
+
+
+def _iter_chunks(rows: Iterator[Dict], chunk_size: int) -> Iterator[List[Dict]]:
+    chunk: List[Dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_stuck_loan_ids(
+    state: str,
+    stale_before: datetime,
+    batch_size: int,
+) -> Iterator[List[UUID]]:
+    """Yields batches of ids of loans still processing on a state since a date.
+
+    Batches are paginated by creation date, then id for loans created at the
+    same time, over the partial index of in-flight loans, so each one is a
+    single indexed range scan.
+
+    :param state: a processing state, eg: 'processing_score'
+    :param stale_before: loans created from this date on are left alone
+    :param batch_size: loans per batch
+    :yields: a list of loan ids
+    """
+    last_seen = None
+    while True:
+        loans = LoanModel.objects.filter(
+            status=LoanStatus.processing.value,
+            state=state,
+            created_at__lt=stale_before,
+        )
+        if last_seen is not None:
+            loans = loans.filter(
+                Q(created_at__gt=last_seen[1]) | Q(created_at=last_seen[1], id__gt=last_seen[0]),
+            )
+        batch = list(
+            loans.order_by('created_at', 'id').values_list('id', 'created_at')[:batch_size],
+        )
+        if not batch:
+            return
+
+        yield [loan_id for loan_id, _ in batch]
+        last_seen = batch[-1]
+
+
 def create_loan(loan_data: Dict) -> LoanModel:
     """Creates a new loan.
 
-    :param loan_data: loan data
+    :param loan_data: loan data already converted by ``PostLoanRequest``
     :return: loan model
     """
-    loan = LoanModel()
-    loan.name = loan_data.get('name')
-    loan.cpf = loan_data.get('cpf')
-    loan.birthdate = convert_str_date_to_object(date=loan_data.get('birthdate'))
-    loan.income = loan_data.get('income')
-    loan.amount = loan_data.get('amount')
-    loan.terms = loan_data.get('terms')
+    loan = _build_loan(loan_data)
     loan.save()
     return loan
 
 
-def start_score_policy(loan_id: str) -> None:
+def create_loans(loans_data: Iterable[Dict]) -> List[LoanModel]:
+    """Creates many loans with batched inserts.
+
+    :param loans_data: an iterable of loan data already converted by ``PostLoanRequest``
+    :return: a list of loan models
+    """
+    loans = [_build_loan(loan_data) for loan_data in loans_data]
+    return LoanModel.objects.bulk_create(loans, batch_size=BULK_CREATE_BATCH_SIZE)
+
+
+def _build_loan(loan_data: Dict) -> LoanModel:
+    return LoanModel(
+        name=loan_data['name'],
+        cpf=loan_data['cpf'],
+        birthdate=loan_data['birthdate'],
+        income=loan_data['income'],
+        amount=loan_data['amount'],
+        terms=loan_data['terms'],
+    )
+
+
+def start_score_policy(loan_id: str, prefetched: Optional[PolicyResponse] = None) -> None:
     """Starts the age policy check.
 
     :param loan_id: id of loan
+    :param prefetched: a score response already fetched, requested when None
+    :return: A model object with loan registry
+    """
+    return run_score_policy(get_loan(UUID(loan_id)), prefetched=prefetched)
+
+
+def run_score_policy(
+    loan: LoanModel,
+    prefetched: Optional[PolicyResponse] = None,
+    deadline: Optional[float] = None,
+) -> LoanModel:
+    """Runs the score check policy on a loaded loan.
+
+    :param loan: a loan model object
+    :param prefetched: a score response already fetched, requested when None
+    :param deadline: a ``time.monotonic()`` value that bounds the score request
     :raises APIException: raises when service get unexpected response
     :return: A model object with loan registry
     """
-    loan = get_loan(UUID(loan_id))
-    service = ScoreService()
+    if not is_policy_pending(loan, LoanPolicies.score.value):
+        return loan
+
     policy = _generate_policy(loan, LoanPolicies.score.value)
     try:
-        response = service.request(request_data={'cpf': loan.cpf})
+        response = _request_service(_get_score_service(), loan, prefetched, deadline)
     except APIException as api_exception:
         _handle_api_exception(policy, api_exception)
         raise api_exception
@@ -192,23 +585,43 @@ def start_score_policy(loan_id: str) -> None:
 
     loan.score = response.get('score')
     loan.process_score()
-    loan.save()
+    _save_step(policy, ('score', 'state'))
 
     return loan
 
 
-def start_commitment_policy(loan_id: str) -> None:  # noqa: WPS210
+def start_commitment_policy(
+    loan_id: str,
+    prefetched: Optional[PolicyResponse] = None,
+) -> None:
     """Starts commitment check policy.
 
     :param loan_id: id of loan
+    :param prefetched: a commitment response already fetched, requested when None
+    :return: A model object with loan registry
+    """
+    return run_commitment_policy(get_loan(UUID(loan_id)), prefetched=prefetched)
+
+
+def run_commitment_policy(  # noqa: WPS210
+    loan: LoanModel,
+    prefetched: Optional[PolicyResponse] = None,
+    deadline: Optional[float] = None,
+) -> LoanModel:
+    """Runs the commitment check policy on a loaded loan.
+
+    :param loan: a loan model object
+    :param prefetched: a commitment response already fetched, requested when None
+    :param deadline: a ``time.monotonic()`` value that bounds the commitment request
     :raises APIException: raises when service get unexpected response
     :return: A model object with loan registry
     """
-    loan = get_loan(UUID(loan_id))
-    service = CommitmentService()
+    if not is_policy_pending(loan, LoanPolicies.commitment.value):
+        return loan
+
     policy = _generate_policy(loan, LoanPolicies.commitment.value)
     try:
-        response = service.request(request_data={'cpf': loan.cpf})
+        response = _request_service(CommitmentService, loan, prefetched, deadline)
     except APIException as api_exception:
         _handle_api_exception(policy, api_exception)
         raise api_exception
@@ -221,12 +634,70 @@ def start_commitment_policy(loan_id: str) -> None:  # noqa: WPS210
 
     loan.commitment = response.get('commitment')
     loan.approve()
-    loan.save()
 
     proposal = ProposalModel()
     proposal.loan = loan
     proposal.amount = loan.amount
     proposal.terms = terms
-    proposal.save()
+    _save_step(policy, ('commitment',) + LOAN_DECISION_FIELDS, proposal)
 
     return loan
+
+
+def start_score_and_commitment_policies(loan_id: str) -> LoanModel:
+    """Starts score and commitment policies fetching both services concurrently.
+
+    Transitions are still applied in order: the commitment response is
+    discarded when the loan was refused by age or score. A loan already past
+    score (e.g. on retry) only runs the commitment policy.
+
+    :param loan_id: id of loan
+    :return: A model object with loan registry
+    """
+    loan = get_loan(UUID(loan_id))
+    if loan.state == PROCESSING_COMMITMENT_STATE:
+        return run_commitment_policy(loan)
+    if loan.state != PROCESSING_SCORE_STATE:
+        return loan
+
+    score_response, commitment_response = fetch_score_and_commitment(loan.cpf)
+    run_score_policy(loan, prefetched=score_response)
+    if loan.state != PROCESSING_COMMITMENT_STATE:
+        return loan
+
+    return run_commitment_policy(loan, prefetched=commitment_response)
+
+
+def start_credit_analysis(loan_id: str) -> LoanModel:
+    """Runs age, score and commitment policies over a single loan load.
+
+    Stops at the first refusal. An APIException leaves the loan on the state
+    of the failed policy, so callers can resume from there.
+
+    :param loan_id: id of loan
+    :return: A model object with loan registry
+    """
+    return run_credit_analysis(get_loan(UUID(loan_id)))
+
+
+def run_credit_analysis(loan: LoanModel, deadline: Optional[float] = None) -> LoanModel:
+    """Runs age, score and commitment policies on a loaded loan.
+
+    :param loan: a loan model object
+    :param deadline: a ``time.monotonic()`` value after which no external
+        policy is started and running requests give up, leaving the loan on
+        its current state
+    :return: A model object with loan registry
+    """
+    if loan.state == PROCESSING_AGE_STATE:
+        run_age_policy(loan)
+    if loan.state == PROCESSING_SCORE_STATE and not _is_expired(deadline):
+        run_score_policy(loan, deadline=deadline)
+    if loan.state == PROCESSING_COMMITMENT_STATE and not _is_expired(deadline):
+        run_commitment_policy(loan, deadline=deadline)
+
+    return loan
+
+
+def _is_expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
@@ -0,0 +1,47 @@
+"""Command that exports loans as NDJSON or CSV.
+
+export_loans.py
+"""
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from api import logic
+from api.consts import EXPORT_CHUNK_SIZE
+from api.exports import EXPORT_FILTERS, EXPORT_FORMATS, get_export_filters, iter_csv, iter_ndjson
+
+
+class Command(BaseCommand):
+    """Export loans command.
+    """
+
+    help = 'Streams loans with their policies and proposal as NDJSON or CSV.'  # noqa: WPS125
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Command arguments.
+
+        :param parser: the command parser
+        """
+        parser.add_argument('--output', choices=EXPORT_FORMATS, default=EXPORT_FORMATS[0])
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument('--created-from', help='Y-m-d')
+        parser.add_argument('--created-to', help='Y-m-d, inclusive')
+        for name in EXPORT_FILTERS:
+            parser.add_argument('--{0}'.format(name))
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Writes the export to stdout.
+
+        :param args: positional arguments
+        :param options: command options
+        :raises CommandError: raised when a date is not on Y-m-d format
+        """
+        try:
+            filters = get_export_filters(options)
+        except ValueError:
+            raise CommandError('Invalid date format, it shoulds Y-m-d format.')
+
+        rows = logic.iter_loans_export(filters, chunk_size=options['chunk_size'])
+        lines = iter_csv(rows) if options['output'] == 'csv' else iter_ndjson(rows)
+        for line in lines:
+            self.stdout.write(line, ending='')
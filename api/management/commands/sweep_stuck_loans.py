@@ -0,0 +1,45 @@
+"""Command that resumes credit analysis of stuck loans.
+
+sweep_stuck_loans.py
+"""
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from api.tasks import requeue_stuck_loans
+
+
+class Command(BaseCommand):
+    """Sweep stuck loans command.
+    """
+
+    help = 'Re-enqueues loans stuck on a processing state from their current state.'  # noqa: WPS125
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Command arguments.
+
+        :param parser: the command parser
+        """
+        parser.add_argument('--stuck-after', type=int, default=settings.LOAN_SWEEP_STUCK_AFTER)
+        parser.add_argument('--batch-size', type=int, default=settings.LOAN_SWEEP_BATCH_SIZE)
+        parser.add_argument(
+            '--batch-interval',
+            type=float,
+            default=settings.LOAN_SWEEP_BATCH_INTERVAL,
+        )
+        parser.add_argument('--max-loans', type=int, default=settings.LOAN_SWEEP_MAX_LOANS)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Writes the number of loans enqueued to stdout.
+
+        :param args: positional arguments
+        :param options: command options
+        """
+        requeued = requeue_stuck_loans(
+            stuck_after=options['stuck_after'],
+            batch_size=options['batch_size'],
+            batch_interval=options['batch_interval'],
+            max_loans=options['max_loans'],
+        )
+        self.stdout.write('{0} stuck loans requeued'.format(requeued))
@@ -0,0 +1,20 @@
+# Generated by Django 3.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_first_migration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
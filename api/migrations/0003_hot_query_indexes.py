@@ -0,0 +1,43 @@
+# Generated by Django 3.1.14 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_loan_created_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interest',
+            index=models.Index(
+                fields=['terms', 'min_score', 'max_score'],
+                name='interest_terms_score_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['cpf'], name='loan_cpf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['status', 'created_at'], name='loan_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(
+                condition=models.Q(status='processing'),
+                fields=['state', 'created_at'],
+                name='loan_processing_state_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='policy',
+            index=models.Index(
+                fields=['loan', 'name', 'failed'],
+                name='policy_loan_name_failed_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.1.14 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='loan',
+            name='loan_processing_state_idx',
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(
+                condition=models.Q(status='processing'),
+                fields=['state', 'created_at', 'id'],
+                name='loan_processing_state_idx',
+            ),
+        ),
+    ]
@@ -26,6 +26,14 @@ class Interest(models.Model):
         validators=[MinValueValidator(Decimal('0'))],
     )
 
+    class Meta(object):
+        indexes = [
+            models.Index(
+                fields=['terms', 'min_score', 'max_score'],
+                name='interest_terms_score_idx',
+            ),
+        ]
+
 
 class Loan(models.Model, LoanStateMachine):
     """Model that represents loan entity.
@@ -81,6 +89,18 @@ class Loan(models.Model, LoanStateMachine):
         choices=LoanStatus.choices(),
         default=LoanStatus.processing.value,
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta(object):
+        indexes = [
+            models.Index(fields=['cpf'], name='loan_cpf_idx'),
+            models.Index(fields=['status', 'created_at'], name='loan_status_created_idx'),
+            models.Index(
+                fields=['state', 'created_at', 'id'],
+                name='loan_processing_state_idx',
+                condition=models.Q(status=LoanStatus.processing.value),
+            ),
+        ]
 
 
 class Policy(models.Model):
@@ -99,6 +119,11 @@ class Policy(models.Model):
         related_name='policies',
     )
 
+    class Meta(object):
+        indexes = [
+            models.Index(fields=['loan', 'name', 'failed'], name='policy_loan_name_failed_idx'),
+        ]
+
 
 class Proposal(models.Model):
     """Model that represent approved proposal.
@@ -0,0 +1,114 @@
+"""Loan completion notifications over redis pub/sub.
+
+notifications.py
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+from uuid import UUID
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_client: redis.Redis = None
+_async_client: aioredis.Redis = None
+
+
+def get_channel(loan_id: UUID) -> str:
+    """Get the pub/sub channel of a loan.
+
+    :param loan_id: UUID object
+    :return: a channel name
+    """
+    return 'api:loan_completed:{0}'.format(loan_id)
+
+
+def publish_loan_completed(loan_id: UUID) -> None:
+    """Notifies waiters that a loan was completed.
+
+    Notifications are best effort: waiters still re-read the loan when
+    their wait times out.
+
+    :param loan_id: UUID object
+    """
+    if not settings.LOAN_STATUS_REDIS_URL:
+        return
+
+    try:
+        _get_client().publish(get_channel(loan_id), 'completed')
+    except redis.RedisError as exception:
+        logger.exception(exception)
+
+
+def _get_client() -> redis.Redis:
+    global _client  # noqa: WPS420
+    if _client is None:
+        _client = redis.Redis.from_url(settings.LOAN_STATUS_REDIS_URL)
+    return _client
+
+
+def _get_async_client() -> aioredis.Redis:
+    global _async_client  # noqa: WPS420
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(settings.LOAN_STATUS_REDIS_URL)
+    return _async_client
+
+
+async def wait_loan_completed(
+    loan_id: UUID,
+    timeout: float,
+    is_completed: Callable[[], Awaitable[bool]],
+) -> None:
+    """Waits, without holding a thread, until a loan is completed or timeout.
+
+    ``is_completed`` is checked after subscribing, so a completion that
+    happens before the subscription is not missed. Redis errors are logged
+    and end the wait early, callers re-read the loan as on a timeout.
+
+    :param loan_id: UUID object
+    :param timeout: seconds to wait
+    :param is_completed: a coroutine function that checks the loan status
+    """
+    if not settings.LOAN_STATUS_REDIS_URL or timeout <= 0:
+        return
+
+    pubsub = _get_async_client().pubsub()
+    try:
+        await _wait_message(pubsub, get_channel(loan_id), timeout, is_completed)
+    except redis.RedisError as exception:
+        logger.exception(exception)
+    finally:
+        await _close_pubsub(pubsub)
+
+
+async def _wait_message(
+    pubsub: aioredis.client.PubSub,
+    channel: str,
+    timeout: float,
+    is_completed: Callable[[], Awaitable[bool]],
+) -> None:
+    await pubsub.subscribe(channel)
+    if await is_completed():
+        return
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        message = await pubsub.get_message(
+            ignore_subscribe_messages=True,
+            timeout=deadline - loop.time(),
+        )
+        if message is not None:
+            return
+
+
+async def _close_pubsub(pubsub: aioredis.client.PubSub) -> None:
+    try:
+        await pubsub.unsubscribe()
+    except redis.RedisError as exception:
+        logger.exception(exception)
+    finally:
+        await pubsub.close()
@@ -2,23 +2,113 @@
 
 schemas.py
 """
-from decimal import Decimal
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Mapping, Tuple
 
-from schema import And, Schema, Use
+from django.core.exceptions import ValidationError
+
+from api.helpers import convert_str_date_to_object
+from api.validators import validate_amount, validate_cpf
+
+
+class CompiledSchema(object):
+    """Single pass validator and coercer of a flat request body.
+
+    Each field has one converter that validates the raw value and returns it
+    already typed, so request values are parsed exactly once.
+    """
+
+    def __init__(self, fields: Dict[str, Callable[[Any], Any]]) -> None:
+        """Compiled schema constructor.
+
+        :param fields: a dict of field name and its converter
+        """
+        self.fields: Tuple[Tuple[str, Callable[[Any], Any]], ...] = tuple(fields.items())
+        self.field_names = frozenset(fields)
+
+    def validate(self, request_data: Mapping[str, Any]) -> Dict[str, Any]:
+        """Validates and converts request data.
+
+        :param request_data: a mapping with the request body
+        :raises ValidationError: raised on missing, unknown or invalid fields
+        :return: a dict with converted values
+        """
+        unknown = set(request_data) - self.field_names
+        if unknown:
+            raise ValidationError('Wrong keys {0}'.format(', '.join(sorted(unknown))))
+
+        payload = {}
+        for name, convert in self.fields:
+            try:
+                value = request_data[name]
+            except KeyError:
+                raise ValidationError('Missing key: {0!r}'.format(name))
+            try:
+                payload[name] = convert(value)
+            except ValidationError as exception:
+                raise ValidationError('Key {0!r} error: {1}'.format(name, exception.messages[0]))
+            except (ValueError, TypeError, InvalidOperation):
+                raise ValidationError('Key {0!r} error: invalid value {1!r}'.format(name, value))
+
+        return payload
+
+
+def _to_name(name: Any) -> str:
+    if not isinstance(name, str) or not name:
+        raise ValidationError('should be a non empty string')
+    return name
+
+
+def _to_cpf(cpf_number: Any) -> str:
+    if not isinstance(cpf_number, str):
+        raise ValidationError('should be a string')
+    validate_cpf(cpf_number)
+    return cpf_number
+
+
+def _to_birthdate(birthdate: Any) -> date:
+    if not isinstance(birthdate, str):
+        raise ValidationError('should be a string')
+    try:
+        return convert_str_date_to_object(date=birthdate)
+    except ValueError:
+        raise ValidationError('Invalid date format, it shoulds Y-m-d format.')
+
+
+def _to_decimal(number: Any) -> Decimal:
+    if isinstance(number, float):
+        number = str(number)
+    return Decimal(number)
+
+
+def _to_amount(amount: Any) -> Decimal:
+    amount = _to_decimal(amount)
+    validate_amount(amount)
+    return amount
+
+
+def _to_terms(terms: Any) -> int:
+    terms = int(terms)
+    if terms < 1:
+        raise ValidationError('should be greater or equal than 1')
+    return terms
+
+
+def _to_income(income: Any) -> Decimal:
+    income = _to_decimal(income)
+    if income < 1:
+        raise ValidationError('should be greater or equal than 1')
+    return income
 
-from api.validators import (
-    validate_amount,
-    validate_birthdate,
-    validate_cpf,
-)
 
-PostLoanRequest = Schema(
+PostLoanRequest = CompiledSchema(
     {
-        'name': And(str, len),
-        'cpf': And(str, validate_cpf),
-        'birthdate': And(str, validate_birthdate),
-        'amount': And(Use(Decimal), validate_amount),
-        'terms': And(Use(int), lambda ter: ter >= 1),
-        'income': And(Use(Decimal), lambda inc: inc >= 1),
+        'name': _to_name,
+        'cpf': _to_cpf,
+        'birthdate': _to_birthdate,
+        'amount': _to_amount,
+        'terms': _to_terms,
+        'income': _to_income,
     },
 )
@@ -1,20 +1,599 @@
 """Module that represents external services call.
 """
 import json
+import os
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from decimal import Decimal
-from typing import Any, Dict
+from threading import Event, Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from uuid import uuid4
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
 from rest_framework import exceptions, status
 from rest_framework.response import Response
 
 
+class Counters(object):
+    """Thread-safe named counters of a process, reported by ``metrics()``.
+    """
+
+    def __init__(self, *names: str) -> None:
+        """Counters constructor.
+
+        :param names: names of the counters, all starting at zero
+        """
+        self._lock = Lock()
+        self._values: Dict[str, int] = dict.fromkeys(names, 0)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Adds to a counter.
+
+        :param name: name of the counter
+        :param amount: value added
+        """
+        with self._lock:
+            self._values[name] += amount
+
+    def as_dict(self) -> Dict[str, int]:
+        """Get a copy of the counters.
+
+        :return: a dict with counters
+        """
+        with self._lock:
+            return dict(self._values)
+
+
+class SessionPool(object):
+    """Keep-alive HTTP session shared by the services of a worker process.
+
+    The session is rebuilt after a fork, so prefork celery workers never
+    share sockets with their parent.
+    """
+
+    def __init__(self) -> None:
+        """Session pool constructor.
+        """
+        self._lock = Lock()
+        self._session: requests.Session = None
+        self._pid: int = None
+        self._counters = Counters('sessions', 'requests', 'errors')
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """Connect and read timeouts of external calls.
+
+        :return: a tuple with connect and read timeout in seconds
+        """
+        return (settings.EXTERNAL_API_CONNECT_TIMEOUT, settings.EXTERNAL_API_READ_TIMEOUT)
+
+    def get_session(self) -> requests.Session:
+        """Get the session of current process, creating it when needed.
+
+        :return: a requests session
+        """
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                self._session = self._create_session()
+                self._pid = os.getpid()
+
+            return self._session
+
+    def post(
+        self,
+        url: str,
+        timeout: Optional[Tuple[float, float]] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Do a POST using the pooled session.
+
+        :param url: the url to post
+        :param timeout: connect and read timeouts, ``timeout`` when None
+        :param kwargs: extra arguments sent to ``requests.Session.post``
+        :raises RequestException: raised when connection fails or times out
+        :return: a response object
+        """
+        self._counters.incr('requests')
+        try:
+            return self.get_session().post(url, timeout=timeout or self.timeout, **kwargs)
+        except requests.RequestException as exception:
+            self._counters.incr('errors')
+            raise exception
+
+    def metrics(self) -> Dict[str, int]:
+        """Pool metrics of current process.
+
+        :return: a dict with counters and opened connections
+        """
+        connections, pooled_requests = 0, 0
+        session = self._session
+        if session is not None and self._pid == os.getpid():
+            pools = session.get_adapter(settings.EXTERNAL_API_URL).poolmanager.pools
+            for pool_key in pools.keys():
+                pool = pools.get(pool_key)
+                if pool is not None:
+                    connections += pool.num_connections
+                    pooled_requests += pool.num_requests
+
+        return {
+            **self._counters.as_dict(),
+            'connections': connections,
+            'pooled_requests': pooled_requests,
+        }
+
+    def close(self) -> None:
+        """Closes the session of current process.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+
+    def _create_session(self) -> requests.Session:
+        pool_size = settings.EXTERNAL_API_POOL_SIZE
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        self._counters.incr('sessions')
+        return session
+
+
+session_pool = SessionPool()
+
+# (status code, response data) where data is None for non 200 responses.
+CachedResponse = Tuple[int, Optional[Dict]]
+
+
+def check_deadline(deadline: Optional[float]) -> None:
+    """Fails once the latency budget of the caller is spent.
+
+    :param deadline: a ``time.monotonic()`` value, no budget when None
+    :raises APIException: raised when the deadline is past
+    """
+    if deadline is not None and time.monotonic() >= deadline:
+        raise exceptions.APIException('Latency budget exceeded')
+
+
+def get_timeout(deadline: Optional[float]) -> Tuple[float, float]:
+    """Get connect and read timeouts of a call, cut to the latency budget left.
+
+    :param deadline: a ``time.monotonic()`` value, no budget when None
+    :raises APIException: raised when the deadline is past
+    :return: a tuple with connect and read timeout in seconds
+    """
+    if deadline is None:
+        return session_pool.timeout
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise exceptions.APIException('Latency budget exceeded')
+
+    connect_timeout, read_timeout = session_pool.timeout
+    return min(connect_timeout, remaining), min(read_timeout, remaining)
+
+
+class SingleFlight(object):
+    """Coalesces concurrent calls on the same key across processes.
+
+    The first caller takes a lock on the default cache and runs the call,
+    the others wait for its outcome, stored under the flight id held by the
+    lock, and get the same response or the same APIException. Waiters run
+    the call themselves if the lock holder dies, exceeds
+    ``EXTERNAL_API_CACHE_LOCK_TIMEOUT`` or fails past its own deadline.
+    """
+
+    poll_interval = 0.05
+    result_timeout = 5
+
+    def __init__(self) -> None:
+        """Single flight constructor.
+        """
+        self._counters = Counters('leaders', 'coalesced')
+
+    def do(
+        self,
+        key: str,
+        fetch: Callable[[], CachedResponse],
+        deadline: Optional[float] = None,
+    ) -> CachedResponse:
+        """Runs fetch once for every concurrent caller of a key.
+
+        :param key: the key of the call
+        :param fetch: a callable that calls the upstream service
+        :param deadline: a ``time.monotonic()`` value after which waiters give up
+        :raises APIException: raised by fetch, on the leader or its waiters
+        :return: a tuple with status code and response data
+        """
+        lock_key = '{0}:lock'.format(key)
+        lock_timeout = settings.EXTERNAL_API_CACHE_LOCK_TIMEOUT
+        lock_deadline = time.monotonic() + lock_timeout
+        wait_deadline = lock_deadline if deadline is None else min(lock_deadline, deadline)
+        while True:
+            flight_id = uuid4().hex
+            if cache.add(lock_key, flight_id, timeout=lock_timeout):
+                return self._lead(key, lock_key, flight_id, fetch, deadline)
+
+            outcome = self._wait_for(key, lock_key, wait_deadline)
+            if outcome is not None:
+                self._counters.incr('coalesced')
+                return self._unpack(outcome)
+            check_deadline(deadline)
+            if time.monotonic() > lock_deadline:
+                return fetch()
+
+    def metrics(self) -> Dict[str, int]:
+        """Leader and coalesced counters of current process.
+
+        :return: a dict with counters
+        """
+        return self._counters.as_dict()
+
+    # An error raised once the leader budget ran out is its own, so it is not
+    # shared: the lock is released without outcome and a waiter takes over.
+    def _lead(
+        self,
+        key: str,
+        lock_key: str,
+        flight_id: str,
+        fetch: Callable[[], CachedResponse],
+        deadline: Optional[float] = None,
+    ) -> CachedResponse:
+        self._counters.incr('leaders')
+        outcome = None
+        try:
+            response = fetch()
+            outcome = ('ok', response)
+        except exceptions.APIException as exception:
+            if deadline is None or time.monotonic() < deadline:
+                outcome = ('error', str(exception.detail))
+            raise exception
+        finally:
+            if outcome is not None:
+                cache.set(self._result_key(key, flight_id), outcome, timeout=self.result_timeout)
+            cache.delete(lock_key)
+
+        return response
+
+    def _wait_for(self, key: str, lock_key: str, deadline: float) -> Optional[Tuple]:
+        flight_id = cache.get(lock_key)
+        if flight_id is None:
+            return None
+
+        result_key = self._result_key(key, flight_id)
+        while time.monotonic() <= deadline:
+            outcome = cache.get(result_key)
+            if outcome is not None:
+                return tuple(outcome)
+            if cache.get(lock_key) != flight_id:
+                outcome = cache.get(result_key)
+                return None if outcome is None else tuple(outcome)
+            time.sleep(self.poll_interval)
+
+        return None
+
+    def _result_key(self, key: str, flight_id: str) -> str:
+        return '{0}:flight:{1}'.format(key, flight_id)
+
+    def _unpack(self, outcome: Tuple) -> CachedResponse:
+        kind, payload = outcome
+        if kind == 'error':
+            raise exceptions.APIException(payload)
+
+        return tuple(payload)  # type: ignore
+
+
+single_flight = SingleFlight()
+
+
+class ResponseCache(object):
+    """TTL cache of external service responses on the default cache.
+
+    200 responses are kept for the service TTL. 4xx responses are negative
+    cached for ``EXTERNAL_API_NEGATIVE_CACHE_TTL`` while 5xx and connection
+    errors are never cached. Misses go through ``single_flight``, so
+    concurrent callers share a single upstream call, cached or not.
+    """
+
+    def __init__(self) -> None:
+        """Response cache constructor.
+        """
+        self._counters = Counters('hits', 'misses')
+
+    def get_or_fetch(
+        self,
+        service_name: str,
+        request_data: Dict,
+        fetch: Callable[[], CachedResponse],
+        deadline: Optional[float] = None,
+    ) -> CachedResponse:
+        """Get a cached response or fetch it once for all concurrent callers.
+
+        :param service_name: name of the service, used on key and TTL
+        :param request_data: A dict with request data, eg: {'cpf': '...'}
+        :param fetch: a callable that calls the upstream service
+        :param deadline: a ``time.monotonic()`` value after which the caller gives up
+        :return: a tuple with status code and response data
+        """
+        ttl = settings.EXTERNAL_API_CACHE_TTL.get(service_name, 0)
+        key = 'api:service:{0}:{1}'.format(service_name, json.dumps(request_data, sort_keys=True))
+        if ttl:
+            cached = cache.get(key)
+            if cached is not None:
+                self._counters.incr('hits')
+                return tuple(cached)  # type: ignore
+
+        return single_flight.do(
+            key,
+            lambda: self._fetch_and_store(key, fetch, ttl),
+            deadline=deadline,
+        )
+
+    def metrics(self) -> Dict[str, int]:
+        """Hit and miss counters of current process.
+
+        Only callers that call the upstream service count as misses.
+
+        :return: a dict with counters
+        """
+        return self._counters.as_dict()
+
+    def _fetch_and_store(
+        self,
+        key: str,
+        fetch: Callable[[], CachedResponse],
+        ttl: int,
+    ) -> CachedResponse:
+        # The previous flight may have stored the response between the
+        # caller's cache miss and winning the lock.
+        if ttl:
+            stored = cache.get(key)
+            if stored is not None:
+                self._counters.incr('hits')
+                return tuple(stored)  # type: ignore
+
+        self._counters.incr('misses')
+        cached = fetch()
+        status_code = cached[0]
+        if not ttl:
+            return cached
+
+        if status_code == status.HTTP_200_OK:
+            cache.set(key, cached, timeout=ttl)
+        elif status.is_client_error(status_code):
+            cache.set(key, cached, timeout=settings.EXTERNAL_API_NEGATIVE_CACHE_TTL)
+
+        return cached
+
+
+response_cache = ResponseCache()
+
+
+def _incr(key: str, timeout: float) -> int:
+    cache.add(key, 0, timeout=timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return 1
+
+
+class CircuitBreaker(object):
+    """Circuit breaker per service, shared by every process through the cache.
+
+    ``EXTERNAL_API_CIRCUIT_FAILURES`` connection errors or 5xx responses within
+    ``EXTERNAL_API_CIRCUIT_WINDOW`` seconds open the circuit: calls fail fast
+    for ``EXTERNAL_API_CIRCUIT_OPEN_TIMEOUT`` seconds. The circuit is then
+    half-open and a single probe call closes or reopens it.
+    """
+
+    def __init__(self) -> None:
+        """Circuit breaker constructor.
+        """
+        self._counters = Counters('opened', 'probes', 'closed', 'rejected')
+
+    def check(self, service_name: str) -> None:
+        """Fails fast while the circuit is open, without claiming the half-open probe.
+
+        :param service_name: name of the service
+        :raises APIException: raised when the circuit is open
+        """
+        if self.get_state(service_name) == 'open':
+            self._counters.incr('rejected')
+            raise exceptions.APIException('Circuit open for {0} service'.format(service_name))
+
+    def before_request(self, service_name: str) -> bool:
+        """Lets a call through, or fails fast while the circuit is open.
+
+        :param service_name: name of the service
+        :raises APIException: raised when the circuit is open or already probed
+        :return: True when the call is the half-open probe
+        """
+        circuit_state = self.get_state(service_name)
+        if circuit_state == 'half_open':
+            probe_timeout = sum(session_pool.timeout)
+            if cache.add(self._key(service_name, 'probe'), 1, timeout=probe_timeout):
+                self._counters.incr('probes')
+                return True
+        elif circuit_state == 'closed':
+            return False
+
+        self._counters.incr('rejected')
+        raise exceptions.APIException('Circuit open for {0} service'.format(service_name))
+
+    def record_success(self, service_name: str) -> None:
+        """Closes the circuit after a successful probe.
+
+        :param service_name: name of the service
+        """
+        if cache.get(self._key(service_name, 'tripped')) is not None:
+            cache.delete_many([
+                self._key(service_name, 'tripped'),
+                self._key(service_name, 'probe'),
+                self._key(service_name, 'failures'),
+            ])
+            self._counters.incr('closed')
+
+    def release_probe(self, service_name: str) -> None:
+        """Lets another call probe, after a probe cut short by its caller.
+
+        :param service_name: name of the service
+        """
+        cache.delete(self._key(service_name, 'probe'))
+
+    def record_failure(self, service_name: str) -> None:
+        """Counts a failure, opening the circuit at threshold or on a failed probe.
+
+        :param service_name: name of the service
+        """
+        if cache.get(self._key(service_name, 'tripped')) is not None:
+            self._open(service_name)
+            return
+
+        failures = _incr(
+            self._key(service_name, 'failures'),
+            timeout=settings.EXTERNAL_API_CIRCUIT_WINDOW,
+        )
+        if failures >= settings.EXTERNAL_API_CIRCUIT_FAILURES:
+            self._open(service_name)
+
+    def get_failures(self, service_name: str) -> int:
+        """Get the failures counted within the current window of a service.
+
+        :param service_name: name of the service
+        :return: number of failures
+        """
+        return cache.get(self._key(service_name, 'failures')) or 0
+
+    def get_state(self, service_name: str) -> str:
+        """Get the shared state of a service circuit.
+
+        :param service_name: name of the service
+        :return: closed, open or half_open
+        """
+        if cache.get(self._key(service_name, 'open')) is not None:
+            return 'open'
+        if cache.get(self._key(service_name, 'tripped')) is not None:
+            return 'half_open'
+
+        return 'closed'
+
+    def metrics(self) -> Dict[str, int]:
+        """Transition counters of current process.
+
+        :return: a dict with counters
+        """
+        return self._counters.as_dict()
+
+    def _open(self, service_name: str) -> None:
+        cache.set(
+            self._key(service_name, 'open'),
+            1,
+            timeout=settings.EXTERNAL_API_CIRCUIT_OPEN_TIMEOUT,
+        )
+        cache.set(self._key(service_name, 'tripped'), 1, timeout=None)
+        cache.delete_many([self._key(service_name, 'probe'), self._key(service_name, 'failures')])
+        self._counters.incr('opened')
+
+    def _key(self, service_name: str, suffix: str) -> str:
+        return 'api:circuit:{0}:{1}'.format(service_name, suffix)
+
+
+circuit_breaker = CircuitBreaker()
+
+
+class RateLimiter(object):
+    """Adaptive calls per second limit per service, shared by every process through the cache.
+
+    The limit is ``EXTERNAL_API_RATE_LIMIT`` divided by one plus the failures
+    the circuit breaker counted within its window, so a struggling upstream
+    gets less traffic before the circuit opens. Calls over the limit wait
+    for the next second, up to ``EXTERNAL_API_RATE_LIMIT_WAIT`` seconds.
+    """
+
+    def __init__(self) -> None:
+        """Rate limiter constructor.
+        """
+        self._counters = Counters('allowed', 'waited', 'throttled')
+
+    def acquire(self, service_name: str, deadline: Optional[float] = None) -> None:
+        """Takes a call from the current second budget of a service.
+
+        :param service_name: name of the service
+        :param deadline: a ``time.monotonic()`` value that cuts the wait short
+        :raises APIException: raised when no budget is freed within the wait
+        """
+        limit = self.get_limit(service_name)
+        if not limit:
+            return
+
+        wait_deadline = time.monotonic() + settings.EXTERNAL_API_RATE_LIMIT_WAIT
+        if deadline is not None:
+            wait_deadline = min(wait_deadline, deadline)
+        while True:
+            now = time.time()
+            window_key = 'api:rate:{0}:{1}'.format(service_name, int(now))
+            if _incr(window_key, timeout=2) <= limit:
+                self._counters.incr('allowed')
+                return
+
+            wait = 1 - (now % 1)
+            if time.monotonic() + wait > wait_deadline:
+                self._counters.incr('throttled')
+                raise exceptions.APIException(
+                    'Rate limit exceeded for {0} service'.format(service_name),
+                )
+            self._counters.incr('waited')
+            time.sleep(wait)
+
+    def get_limit(self, service_name: str) -> int:
+        """Get the current calls per second limit of a service.
+
+        :param service_name: name of the service
+        :return: calls per second, 0 when disabled
+        """
+        limit = settings.EXTERNAL_API_RATE_LIMIT
+        if not limit:
+            return 0
+
+        return max(1, limit // (1 + circuit_breaker.get_failures(service_name)))
+
+    def metrics(self) -> Dict[str, int]:
+        """Allowed, waited and throttled counters of current process.
+
+        :return: a dict with counters
+        """
+        return self._counters.as_dict()
+
+
+rate_limiter = RateLimiter()
+
+
+# True when the caller budget ran out, or the call timed out on a timeout
+# shortened to the budget.
+def _is_cut_short(
+    exception: Exception,
+    timeout: Tuple[float, float],
+    deadline: Optional[float],
+) -> bool:
+    if deadline is None:
+        return False
+    if time.monotonic() >= deadline:
+        return True
+
+    is_timeout = isinstance(exception.__cause__, requests.Timeout)
+    return is_timeout and timeout != session_pool.timeout
+
+
 class BaseService(ABC):
     """Base class for services.
     """
 
+    name: str = None
+
     def __init__(self) -> None:
         """Base constructor.
         """
@@ -24,31 +603,74 @@ class BaseService(ABC):
         }
         self.url: str = None
 
-    def request(self, request_data: Dict) -> Dict[str, Any]:
+    def request(self, request_data: Dict, deadline: Optional[float] = None) -> Dict[str, Any]:
         """Do a url request.
 
+        Responses are served from ``response_cache`` when still fresh, upstream
+        calls go through ``circuit_breaker`` and ``rate_limiter``. Waits and
+        timeouts are cut to ``deadline``.
+
         :param request_data: A dictionary with request sended data
+        :param deadline: a ``time.monotonic()`` value, the latency budget of the caller
         :raises APIException: raised when get unexpected response from server
         :return: A dict with response data eg: {'score': 704}
         """
-        response = self._request_helper(request_data=request_data)
-        if response.status_code != status.HTTP_200_OK:
+        status_code, response_data = response_cache.get_or_fetch(
+            self.name,
+            request_data,
+            lambda: self._fetch(request_data, deadline),
+            deadline=deadline,
+        )
+        if status_code != status.HTTP_200_OK:
             raise exceptions.APIException('Unexpected response from server')
 
-        return dict(response.json())
+        return dict(response_data)
 
-    def _post(self, request_data: Dict) -> Response:
-        return requests.post(
-            self.url,
-            data=json.dumps(request_data),
-            headers=self.headers,
-        )
+    # A call cut short by the caller budget says nothing about upstream health,
+    # so it is not counted as a failure and a probe cut short lets another call
+    # probe. Any other transport error is a failure, reopening a probed circuit.
+    def _fetch(self, request_data: Dict, deadline: Optional[float] = None) -> CachedResponse:
+        circuit_breaker.check(self.name)
+        rate_limiter.acquire(self.name, deadline=deadline)
+        timeout = get_timeout(deadline)
+        is_probe = circuit_breaker.before_request(self.name)
+        try:
+            response = self._request_helper(request_data=request_data, timeout=timeout)
+        except exceptions.APIException as exception:
+            if not _is_cut_short(exception, timeout, deadline):
+                circuit_breaker.record_failure(self.name)
+            elif is_probe:
+                circuit_breaker.release_probe(self.name)
+            raise exception
+
+        if status.is_server_error(response.status_code):
+            circuit_breaker.record_failure(self.name)
+        else:
+            circuit_breaker.record_success(self.name)
+        if response.status_code != status.HTTP_200_OK:
+            return response.status_code, None
+
+        return response.status_code, dict(response.json())
+
+    def _post(self, request_data: Dict, timeout: Tuple[float, float]) -> Response:
+        try:
+            return session_pool.post(
+                self.url,
+                timeout=timeout,
+                data=json.dumps(request_data),
+                headers=self.headers,
+            )
+        except requests.RequestException as exception:
+            raise exceptions.APIException(
+                'Unable to reach server: {0}'.format(exception),
+            ) from exception
 
     @abstractmethod
-    def _request_helper(self, request_data: Dict) -> Response:
+    def _request_helper(self, request_data: Dict, timeout: Tuple[float, float]) -> Response:
         """Should override.
 
         :param request_data: A dict with request data
+        :param timeout: connect and read timeouts of the call
         """
 
 
@@ -56,35 +678,183 @@ class ScoreService(BaseService):
     """Service for score calculation.
     """
 
+    name = 'score'
+
     def __init__(self) -> None:
         """Score Service constructor.
         """
         super().__init__()
         self.url = '{0}/{1}'.format(settings.EXTERNAL_API_URL, 'score')
 
-    def _request_helper(self, request_data: Dict) -> Response:
-        return self._post(request_data)
+    def _request_helper(self, request_data: Dict, timeout: Tuple[float, float]) -> Response:
+        return self._post(request_data, timeout)
 
 
 class CommitmentService(BaseService):
     """Service for score calculation.
     """
 
+    name = 'commitment'
+
     def __init__(self) -> None:
         """Score Service constructor.
         """
         super().__init__()
         self.url = '{0}/{1}'.format(settings.EXTERNAL_API_URL, 'commitment')
 
-    def request(self, request_data: Dict) -> Dict[str, Any]:
+    def request(self, request_data: Dict, deadline: Optional[float] = None) -> Dict[str, Any]:
         """Do a url request.
 
         :param request_data: A dictionary with request sended data
+        :param deadline: a ``time.monotonic()`` value, the latency budget of the caller
         :return: A dict with response data eg: {'commitment': Decimal('0.12')}
         """
-        response = super().request(request_data)
+        response = super().request(request_data, deadline=deadline)
         response.update({'commitment': Decimal(response.get('commitment'))})
         return response
 
-    def _request_helper(self, request_data: Dict) -> Response:
-        return self._post(request_data)
+    def _request_helper(self, request_data: Dict, timeout: Tuple[float, float]) -> Response:
+        return self._post(request_data, timeout)
+
+
+class _Batch(object):
+    def __init__(self) -> None:
+        self.requests: Dict[str, Tuple[Dict, List[Future]]] = {}
+        self.size = 0
+        self.full = Event()
+
+    def add(self, request_data: Dict) -> Future:
+        future: Future = Future()
+        key = json.dumps(request_data, sort_keys=True)
+        self.requests.setdefault(key, (request_data, []))[1].append(future)
+        self.size += 1
+        return future
+
+
+class MicroBatcher(object):
+    """Micro-batches the requests of concurrent callers of a process to a service.
+
+    Requests arriving within ``EXTERNAL_API_SCORE_BATCH_WAIT`` seconds, up to
+    ``EXTERNAL_API_SCORE_BATCH_SIZE``, are dispatched together by the first
+    caller: each distinct request is sent once, in parallel over the pooled
+    session, and its response or error is handed to every caller waiting for
+    it. Batching pays off with threaded or green worker pools, where many
+    tasks of a process wait on upstream at once.
+    """
+
+    def __init__(self, service_class: Type[BaseService]) -> None:
+        """Micro batcher constructor.
+
+        :param service_class: the service each request is dispatched to
+        """
+        self.service_class = service_class
+        self._lock = Lock()
+        self._batch: _Batch = None
+        self._executor: ThreadPoolExecutor = None
+        self._pid: int = None
+        self._counters = Counters('batches', 'requests', 'dispatched')
+
+    def request(self, request_data: Dict, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Do a url request along with the concurrent callers of the batch window.
+
+        The dispatched request is shared by the batch, so ``deadline`` only
+        cuts the waits of this caller: the batch window when it leads the
+        batch, then the wait for its response.
+
+        :param request_data: A dictionary with request sended data
+        :param deadline: a ``time.monotonic()`` value, the latency budget of the caller
+        :raises APIException: raised when get unexpected response from server
+        :return: A dict with response data eg: {'score': 704}
+        """
+        with self._lock:
+            batch = self._batch
+            is_leader = batch is None
+            if is_leader:
+                batch = self._batch = _Batch()
+            future = batch.add(request_data)
+            if batch.size >= settings.EXTERNAL_API_SCORE_BATCH_SIZE:
+                self._batch = None
+                batch.full.set()
+
+        if is_leader:
+            window = settings.EXTERNAL_API_SCORE_BATCH_WAIT
+            if deadline is not None:
+                window = max(min(window, deadline - time.monotonic()), 0)
+            batch.full.wait(window)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            self._dispatch(batch)
+
+        timeout = self._get_result_timeout()
+        if deadline is not None:
+            timeout = max(min(timeout, deadline - time.monotonic()), 0)
+        try:
+            return dict(future.result(timeout=timeout))
+        except FutureTimeoutError:
+            raise exceptions.APIException(
+                'Timed out waiting for {0} batch'.format(self.service_class.name),
+            )
+
+    def metrics(self) -> Dict[str, int]:
+        """Batch counters of current process.
+
+        :return: a dict with batches, requests received and requests dispatched
+        """
+        return self._counters.as_dict()
+
+    def _dispatch(self, batch: _Batch) -> None:
+        self._counters.incr('batches')
+        self._counters.incr('requests', batch.size)
+        self._counters.incr('dispatched', len(batch.requests))
+        executor = self._get_executor()
+        for request_data, futures in batch.requests.values():
+            executor.submit(self._fetch, request_data, futures)
+
+    # Worst case of a dispatched request: batch window, single flight wait,
+    # rate limit wait, then the upstream call itself.
+    def _get_result_timeout(self) -> float:
+        return (
+            settings.EXTERNAL_API_SCORE_BATCH_WAIT
+            + settings.EXTERNAL_API_CACHE_LOCK_TIMEOUT
+            + settings.EXTERNAL_API_RATE_LIMIT_WAIT
+            + sum(session_pool.timeout)
+        )
+
+    # Every error is handed to the callers, as they would get it without batching.
+    def _fetch(self, request_data: Dict, futures: List[Future]) -> None:
+        try:
+            response = self.service_class().request(request_data=request_data)
+        except Exception as exception:
+            for future in futures:
+                future.set_exception(exception)
+            return
+
+        for future in futures:
+            future.set_result(response)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=settings.EXTERNAL_API_POOL_SIZE)
+                self._pid = os.getpid()
+
+            return self._executor
+
+
+score_batcher = MicroBatcher(ScoreService)
+
+
+class BatchScoreService(ScoreService):
+    """Service for score calculation, micro-batched by ``score_batcher``.
+    """
+
+    def request(self, request_data: Dict, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Do a url request along with the concurrent callers of the process.
+
+        :param request_data: A dictionary with request sended data
+        :param deadline: a ``time.monotonic()`` value, the latency budget of the caller
+        :return: A dict with response data eg: {'score': 704}
+        """
+        return score_batcher.request(request_data, deadline=deadline)
+
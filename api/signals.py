@@ -0,0 +1,40 @@
+"""Model signal receivers.
+
+signals.py
+"""
+from functools import partial
+from typing import Any
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.enums import LoanStatus
+from api.interest_index import interest_index
+from api.models import Interest, Loan
+from api.notifications import publish_loan_completed
+
+
+@receiver(post_save, sender=Interest)
+@receiver(post_delete, sender=Interest)
+def invalidate_interest_index(**kwargs: Any) -> None:
+    """Drops the interest index whenever the Interest table changes.
+
+    The current process drops it at once, other processes are told through
+    the shared version when the change is committed.
+
+    :param kwargs: signal arguments
+    """
+    interest_index.drop()
+    transaction.on_commit(interest_index.invalidate)
+
+
+@receiver(post_save, sender=Loan)
+def notify_loan_completed(instance: Loan, **kwargs: Any) -> None:
+    """Notifies waiters once a loan is completed and committed.
+
+    :param instance: the saved loan
+    :param kwargs: signal arguments
+    """
+    if instance.status == LoanStatus.completed.value:
+        transaction.on_commit(partial(publish_loan_completed, instance.pk))
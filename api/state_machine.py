@@ -3,7 +3,8 @@ State machines transitions.
 
 state_machine.py
 """
-from typing import Tuple
+from functools import lru_cache
+from typing import Dict, Tuple
 
 from transitions import Machine
 
@@ -28,43 +29,95 @@ LOAN_PROCESSING_STATES = (
 )
 
 
-class LoanStateMachine(Machine):
+LOAN_TRANSITIONS: Tuple[Dict, ...] = (
+    {
+        'trigger': 'refuse',
+        'source': LOAN_PROCESSING_STATES,
+        'dest': REFUSED_STATE,
+        'after': 'after_refuse',
+        'conditions': ['should_refuse'],
+    },
+    {
+        'trigger': 'process_age',
+        'source': PROCESSING_AGE_STATE,
+        'dest': PROCESSING_SCORE_STATE,
+        'conditions': ['should_processing', 'should_process_age'],
+    },
+    {
+        'trigger': 'process_score',
+        'source': PROCESSING_SCORE_STATE,
+        'dest': PROCESSING_COMMITMENT_STATE,
+        'conditions': ['should_processing', 'should_process_score'],
+    },
+    {
+        'trigger': 'approve',
+        'source': PROCESSING_COMMITMENT_STATE,
+        'dest': APPROVED_STATE,
+        'conditions': ['should_processing', 'should_approve'],
+        'after': 'after_approve',
+    },
+)
+
+
+@lru_cache(maxsize=None)
+def get_loan_machine() -> Machine:
+    """Get the loan state graph, compiled once per process.
+
+    The machine holds no model: each loan is passed to the event being
+    triggered, and its ``state`` attribute is read and written in place.
+
+    :return: a transitions machine
+    """
+    return Machine(
+        model=[],
+        states=list(LOAN_STATES),
+        transitions=list(LOAN_TRANSITIONS),
+        initial=LOAN_STATES[0],
+        auto_transitions=False,
+    )
+
+
+class LoanStateMachine(object):
     """State Machine transitions from Loan Entity.
     """
 
     states: Tuple = LOAN_STATES
 
-    def __init__(self) -> None:
-        """Loan state machine constructor.
+    def trigger(self, trigger_name: str) -> bool:
+        """Triggers a transition on the shared loan machine.
+
+        :param trigger_name: name of the transition trigger
+        :return: True when the transition was executed
+        """
+        return get_loan_machine().events[trigger_name].trigger(self)
+
+    def refuse(self) -> bool:
+        """Triggers refuse transition.
+
+        :return: True when the transition was executed
+        """
+        return self.trigger('refuse')
+
+    def process_age(self) -> bool:
+        """Triggers process_age transition.
+
+        :return: True when the transition was executed
+        """
+        return self.trigger('process_age')
+
+    def process_score(self) -> bool:
+        """Triggers process_score transition.
+
+        :return: True when the transition was executed
         """
-        initial_state = self.state or self.states[0]
-        super().__init__(model=self, states=self.states, initial=initial_state)
-        self.add_transition(
-            trigger='refuse',
-            source=LOAN_PROCESSING_STATES,
-            dest='refused',
-            after='after_refuse',
-            conditions=['should_refuse'],
-        )
-        self.add_transition(
-            trigger='process_age',
-            source=PROCESSING_AGE_STATE,
-            dest=PROCESSING_SCORE_STATE,
-            conditions=['should_processing', 'should_process_age'],
-        )
-        self.add_transition(
-            trigger='process_score',
-            source=PROCESSING_SCORE_STATE,
-            dest=PROCESSING_COMMITMENT_STATE,
-            conditions=['should_processing', 'should_process_score'],
-        )
-        self.add_transition(
-            trigger='approve',
-            source=PROCESSING_COMMITMENT_STATE,
-            dest='approved',
-            conditions=['should_processing', 'should_approve'],
-            after='after_approve',
-        )
+        return self.trigger('process_score')
+
+    def approve(self) -> bool:
+        """Triggers approve transition.
+
+        :return: True when the transition was executed
+        """
+        return self.trigger('approve')
 
     def should_refuse(self) -> bool:
         """Condition that checks if refuse transition should triggered.
@@ -74,10 +127,9 @@ class LoanStateMachine(Machine):
         return bool(self.refused_policy)
 
     def after_refuse(self) -> None:
-        """Event that happens after refuse trigger."""
+        """Event that happens after refuse trigger, saving is up to the caller."""
         self.result = LoanResult.refused.value
         self.status = LoanStatus.completed.value
-        self.save()
 
     def should_processing(self) -> bool:
         """Condition that checks if still able to processing triggers.
@@ -86,16 +138,42 @@ class LoanStateMachine(Machine):
         """
         return not bool(self.refused_policy)
 
+    def record_policy(self, policy_name: str, passed: bool) -> None:
+        """Keeps in memory whether a policy of this instance has passed.
+
+        :param policy_name: name of policy
+        :param passed: False when the policy failed
+        """
+        passed_policies = self.__dict__.setdefault('_passed_policies', set())
+        if passed:
+            passed_policies.add(policy_name)
+        else:
+            passed_policies.discard(policy_name)
+
+    def has_passed_policy(self, policy_name: str) -> bool:
+        """Checks if a policy was run without failing.
+
+        Policies recorded on this instance cost no query, others a single
+        EXISTS lookup.
+
+        :param policy_name: name of policy
+        :return: boolean value that satifies the condition
+        """
+        if policy_name in self.__dict__.get('_passed_policies', ()):
+            return True
+
+        passed = self.policies.filter(name=policy_name, failed=False).exists()
+        if passed:
+            self.record_policy(policy_name, passed=True)
+
+        return passed
+
     def should_process_age(self) -> bool:
         """Condition that checks if process_age transition should triggered.
 
         :return: boolean value that satifies the condition
         """
-        for policy in self.policies.all():
-            if policy.name == LoanPolicies.age.value and not policy.failed:
-                return True
-
-        return False
+        return self.has_passed_policy(LoanPolicies.age.value)
 
     def should_process_score(self) -> bool:
         """Condition that checks if process_score transition should triggered.
@@ -105,11 +183,7 @@ class LoanStateMachine(Machine):
         if self.score is None:
             return False
 
-        for policy in self.policies.all():
-            if policy.name == LoanPolicies.score.value and not policy.failed:
-                return True
-
-        return False
+        return self.has_passed_policy(LoanPolicies.score.value)
 
     def should_approve(self) -> bool:
         """Condition that checks if approve transition should triggered.
@@ -119,14 +193,9 @@ class LoanStateMachine(Machine):
         if self.commitment is None:
             return False
 
-        for policy in self.policies.all():
-            if policy.name == LoanPolicies.commitment.value and not policy.failed:
-                return True
-
-        return False
+        return self.has_passed_policy(LoanPolicies.commitment.value)
 
     def after_approve(self) -> None:
-        """Event that happens after approve trigger."""
+        """Event that happens after approve trigger, saving is up to the caller."""
         self.result = LoanResult.approved.value
         self.status = LoanStatus.completed.value
-        self.save()
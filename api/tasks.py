@@ -1,25 +1,198 @@
 """App tasks for processing in celery.
 """
 import logging
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+from typing import Any, Iterable, Iterator, List
+from uuid import UUID
 
-from celery import chain
+from celery import Signature, chain
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
 
 from api import consts, logic
+from api.enums import PipelineMode
+from api.models import Loan
+from api.state_machine import (
+    LOAN_PROCESSING_STATES,
+    PROCESSING_AGE_STATE,
+    PROCESSING_COMMITMENT_STATE,
+    PROCESSING_SCORE_STATE,
+)
 from noverde_backend.celery import app
 
 logger = logging.getLogger(__name__)
 
 
+def get_credit_analysis_pipeline(loan_id: str) -> Signature:
+    """Get the credit analysis signature of the configured pipeline mode.
+
+    :param loan_id: uuid of loan
+    :return: a celery signature
+    """
+    if settings.CREDIT_ANALYSIS_PIPELINE == PipelineMode.fused.value:
+        return credit_analysis.si(loan_id)
+
+    return age_policy.si(loan_id) | get_external_policies_pipeline(loan_id)
+
+
+def get_external_policies_pipeline(loan_id: str) -> Signature:
+    """Get the signature of the policies after age, for the configured pipeline mode.
+
+    :param loan_id: uuid of loan
+    :return: a celery signature
+    """
+    if settings.CREDIT_ANALYSIS_PIPELINE == PipelineMode.fused.value:
+        return credit_analysis.si(loan_id)
+
+    if settings.CREDIT_ANALYSIS_PIPELINE == PipelineMode.concurrent.value:
+        return score_and_commitment_policies.si(loan_id)
+
+    return chain(score_policy.si(loan_id), commitment_policy.si(loan_id))
+
+
+def get_retry_countdown(retries: int) -> float:
+    """Get an exponential backoff with full jitter for a policy task retry.
+
+    :param retries: retries already done by the task
+    :return: seconds to wait before the next retry
+    """
+    backoff = settings.POLICY_RETRY_BACKOFF * 2 ** retries
+    return random.uniform(0, min(backoff, settings.POLICY_RETRY_BACKOFF_MAX))  # noqa: S311
+
+
 def send_to_credit_analysis(loan_id: str) -> None:
     """Send parameters to credit analysis tasks.
 
     :param loan_id: uuid of loan
     """
-    chain(
-        age_policy.si(loan_id),
-        score_policy.si(loan_id),
-        commitment_policy.si(loan_id),
-    )()
+    get_credit_analysis_pipeline(loan_id).apply_async()
+
+
+def send_many_to_credit_analysis(loan_ids: Iterable[str]) -> None:
+    """Send many loans to credit analysis over a single broker connection.
+
+    Age policy runs in batches of ``AGE_POLICY_BATCH_SIZE`` loans, each loan
+    that passes is then sent to the next policies.
+
+    :param loan_ids: uuids of loans
+    """
+    with app.producer_or_acquire() as producer:
+        for batch in _iter_batches(loan_ids, consts.AGE_POLICY_BATCH_SIZE):
+            age_policy_batch.apply_async((batch,), producer=producer)
+
+
+def _iter_batches(loan_ids: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    loan_ids = iter(loan_ids)
+    batch = list(islice(loan_ids, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(loan_ids, batch_size))
+
+
+def resume_credit_analysis(loan_id: str, state: str, producer: Any = None) -> None:
+    """Enqueues the per-policy tasks still pending for a loan state.
+
+    :param loan_id: uuid of loan
+    :param state: current state of loan
+    :param producer: a kombu producer to publish with, acquired when None
+    """
+    if state == PROCESSING_AGE_STATE:
+        signature = get_credit_analysis_pipeline(loan_id)
+    elif state == PROCESSING_SCORE_STATE:
+        signature = chain(score_policy.si(loan_id), commitment_policy.si(loan_id))
+    elif state == PROCESSING_COMMITMENT_STATE:
+        signature = commitment_policy.si(loan_id)
+    else:
+        return
+
+    signature.apply_async(producer=producer)
+
+
+def requeue_stuck_loans(
+    stuck_after: float,
+    batch_size: int,
+    batch_interval: float,
+    max_loans: int,
+) -> int:
+    """Resumes credit analysis of loans processing for longer than expected.
+
+    A loan is claimed for ``stuck_after`` seconds when re-enqueued, so
+    concurrent or following sweeps leave it alone while it is resumed.
+    Loans stuck on age are sent as a single age policy batch.
+
+    :param stuck_after: seconds since creation after which a processing loan is stuck
+    :param batch_size: loans enqueued per batch
+    :param batch_interval: seconds to wait between batches
+    :param max_loans: maximum loans enqueued per call
+    :return: number of loans enqueued
+    """
+    stale_before = timezone.now() - timedelta(seconds=stuck_after)
+    requeued = 0
+    for state in LOAN_PROCESSING_STATES:
+        for loan_ids in logic.iter_stuck_loan_ids(state, stale_before, batch_size):
+            claimed = [
+                str(loan_id) for loan_id in loan_ids[:max_loans - requeued]
+                if cache.add(_get_sweep_claim_key(loan_id), 1, timeout=stuck_after)
+            ]
+            if claimed:
+                if requeued:
+                    time.sleep(batch_interval)
+                with app.producer_or_acquire() as producer:
+                    if state == PROCESSING_AGE_STATE:
+                        age_policy_batch.apply_async((claimed,), producer=producer)
+                    else:
+                        for loan_id in claimed:
+                            resume_credit_analysis(loan_id, state, producer=producer)
+                requeued += len(claimed)
+                logger.warning('Requeued %d loans stuck on %s', len(claimed), state)
+
+            if requeued >= max_loans:
+                return requeued
+
+    return requeued
+
+
+def _get_sweep_claim_key(loan_id: UUID) -> str:
+    return 'api:sweeper:{0}'.format(loan_id)
+
+
+def run_inline_credit_analysis(loan: Loan) -> None:
+    """Runs credit analysis in the caller process within the latency budget.
+
+    External requests are cut to the budget left, so the caller is held for
+    about the budget at most. Whatever is left when the budget runs out or
+    upstream fails goes to the per-policy celery tasks.
+
+    :param loan: a loan model object
+    """
+    deadline = time.monotonic() + settings.LOAN_SYNC_ANALYSIS_BUDGET
+    try:
+        logic.run_credit_analysis(loan, deadline=deadline)
+    except logic.APIException as exception:
+        logger.exception(exception)
+
+    if loan.state in LOAN_PROCESSING_STATES:
+        resume_credit_analysis(str(loan.id), loan.state)
+
+
+@app.task(queue='credit_analysis', name='credit_analysis')
+def credit_analysis(loan_id: str) -> None:
+    """Task that runs every policy at once, stopping at the first refusal.
+
+    Upstream errors hand the loan over to the per-policy retry tasks.
+
+    :param loan_id: uuid of loan
+    """
+    try:
+        logic.start_credit_analysis(loan_id)
+    except logic.APIException as exception:
+        logger.exception(exception)
+        loan = logic.get_loan(UUID(loan_id))
+        resume_credit_analysis(loan_id, loan.state)
 
 
 @app.task(queue='age_policy', name='age_policy')
@@ -34,6 +207,21 @@ def age_policy(loan_id: str) -> None:
         logger.exception(exception)
 
 
+@app.task(queue='age_policy', name='age_policy_batch')
+def age_policy_batch(loan_ids: List[str]) -> None:
+    """Task that starts age_policy on a batch of loans.
+
+    Each loan that passes is sent to the next policies of the pipeline mode.
+
+    :param loan_ids: uuids of loans
+    """
+    loans = logic.start_age_policies(loan_ids)
+    with app.producer_or_acquire() as producer:
+        for loan in loans:
+            if loan.state == PROCESSING_SCORE_STATE:
+                get_external_policies_pipeline(str(loan.id)).apply_async(producer=producer)
+
+
 @app.task(queue='score_policy', name='score_policy', bind=True, max_retries=consts.MAX_RETRIES)
 def score_policy(self: app.task, loan_id: str) -> None:
     """Task that starts score_policy.
@@ -45,7 +233,7 @@ def score_policy(self: app.task, loan_id: str) -> None:
         logic.start_score_policy(loan_id)
     except logic.APIException as exception:
         logger.exception(exception)
-        self.retry(exc=exception)
+        self.retry(exc=exception, countdown=get_retry_countdown(self.request.retries))
 
 
 @app.task(
@@ -64,4 +252,37 @@ def commitment_policy(self: app.task, loan_id: str) -> None:
         logic.start_commitment_policy(loan_id)
     except logic.APIException as exception:
         logger.exception(exception)
-        self.retry(exc=exception)
+        self.retry(exc=exception, countdown=get_retry_countdown(self.request.retries))
+
+
+@app.task(
+    queue='external_policies',
+    name='score_and_commitment_policies',
+    bind=True,
+    max_retries=consts.MAX_RETRIES,
+)
+def score_and_commitment_policies(self: app.task, loan_id: str) -> None:
+    """Task that starts score and commitment policies with concurrent fetching.
+
+    :param self: task
+    :param loan_id: uuid of loan
+    """
+    try:
+        logic.start_score_and_commitment_policies(loan_id)
+    except logic.APIException as exception:
+        logger.exception(exception)
+        self.retry(exc=exception, countdown=get_retry_countdown(self.request.retries))
+
+
+@app.task(queue='maintenance', name='sweep_stuck_loans')
+def sweep_stuck_loans() -> int:
+    """Periodic task that resumes loans stuck on a processing state.
+
+    :return: number of loans enqueued
+    """
+    return requeue_stuck_loans(
+        stuck_after=settings.LOAN_SWEEP_STUCK_AFTER,
+        batch_size=settings.LOAN_SWEEP_BATCH_SIZE,
+        batch_interval=settings.LOAN_SWEEP_BATCH_INTERVAL,
+        max_loans=settings.LOAN_SWEEP_MAX_LOANS,
+    )
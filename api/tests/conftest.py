@@ -4,10 +4,12 @@ from decimal import Decimal
 from typing import Any, Tuple, Generator
 
 import pytest
+from django.core.cache import cache
 from django.core.management import call_command
 from mixer.backend.django import mixer
 
 from api.helpers import convert_str_date_to_object
+from api.interest_index import interest_index
 
 
 def get_some_loans() -> Tuple[Any, ...]:
@@ -103,3 +105,31 @@ def interests() -> Generator:
     """
     call_command('loaddata', 'interest.json')
     yield 'interests'
+
+
+@pytest.fixture(autouse=True)
+def fresh_interest_index() -> Generator:
+    """Fixture that drops the interest index between tests.
+
+    Rolled back transactions do not send signals, so the index is dropped by hand.
+
+    :yields: the process interest index
+    """
+    interest_index.invalidate()
+    yield interest_index
+    interest_index.invalidate()
+
+
+@pytest.fixture()
+def locmem_cache(settings: Any) -> Generator:
+    """Fixture that swaps the dummy cache by a local memory one.
+
+    :param settings: django settings fixture
+    :yields: django settings fixture
+    """
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }
+    cache.clear()
+    yield settings
+    cache.clear()
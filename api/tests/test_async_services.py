@@ -0,0 +1,93 @@
+"""Test async services against a local stub server.
+"""
+import asyncio
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict
+
+import pytest
+from aiohttp import web
+from rest_framework import exceptions
+
+from api import async_services
+
+
+def run_against_stub(
+    settings: Any,
+    responses: Dict[str, Any],
+    coroutine: Callable[[], Awaitable],
+) -> Any:
+    """Runs a coroutine while a stub external api is listening.
+
+    :param settings: django settings fixture
+    :param responses: a dict of path and (status, body) served by the stub
+    :param coroutine: a coroutine function to run
+    :return: the coroutine result
+    """
+    async def handler(request: web.Request) -> web.Response:  # noqa: WPS430
+        status_code, body = responses[request.path.strip('/')]
+        return web.json_response(body, status=status_code)
+
+    async def main() -> Any:  # noqa: WPS430
+        app = web.Application()
+        app.router.add_post('/{name}', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # noqa: WPS437
+        settings.EXTERNAL_API_URL = 'http://127.0.0.1:{0}'.format(port)
+        settings.EXTERNAL_API_TOKEN = 'token'
+        try:
+            return await coroutine()
+        finally:
+            await async_services.async_session_pool.close()
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_async_services_should_get_succesfull_response(settings: Any) -> None:
+    """Test if async services get succesfull responses concurrently.
+
+    :param settings: django settings fixture
+    """
+    responses = {'score': (200, {'score': 701}), 'commitment': (200, {'commitment': 0.5})}
+
+    async def fetch() -> Any:  # noqa: WPS430
+        return await asyncio.gather(
+            async_services.AsyncScoreService().request({'cpf': '72456336062'}),
+            async_services.AsyncCommitmentService().request({'cpf': '72456336062'}),
+        )
+
+    score, commitment = run_against_stub(settings, responses, fetch)
+
+    assert score == {'score': 701}
+    assert commitment == {'commitment': Decimal('0.5')}
+
+
+def test_async_score_service_should_raise_api_exception(settings: Any) -> None:
+    """Test if async score service raises APIException on unexpected response.
+
+    :param settings: django settings fixture
+    """
+    responses = {'score': (500, {'error': 'boom'})}
+
+    async def fetch() -> Any:  # noqa: WPS430
+        return await async_services.AsyncScoreService().request({'cpf': '72456336062'})
+
+    with pytest.raises(exceptions.APIException, match='Unexpected response from server'):
+        run_against_stub(settings, responses, fetch)
+
+
+def test_async_session_pool_should_close_sessions_of_finished_loops() -> None:
+    """Test if each loop gets its own session, closed when the loop shuts down.
+    """
+    async def get_session() -> Any:  # noqa: WPS430
+        return async_services.async_session_pool.get_session()
+
+    first_session = asyncio.run(get_session())
+    second_session = asyncio.run(get_session())
+
+    assert first_session is not second_session
+    assert first_session.closed
+    assert second_session.closed
@@ -0,0 +1,33 @@
+"""Test management commands.
+"""
+import json
+from io import StringIO
+from typing import Tuple
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db()
+def test_export_loans_should_write_every_loan(loans: Tuple) -> None:
+    """Test if export_loans writes every loan, across chunks.
+
+    :param loans: a fixture that contains a immutable list of loans
+    """
+    stdout = StringIO()
+    call_command('export_loans', '--chunk-size=3', stdout=stdout)
+    rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    assert sorted(row['id'] for row in rows) == sorted(str(loan.id) for loan in loans)
+
+
+@pytest.mark.django_db()
+def test_sweep_stuck_loans_should_skip_recent_loans(loans: Tuple) -> None:
+    """Test if sweep_stuck_loans leaves loans created within the threshold alone.
+
+    :param loans: a fixture that contains a immutable list of loans
+    """
+    stdout = StringIO()
+    call_command('sweep_stuck_loans', '--stuck-after=3600', stdout=stdout)
+
+    assert stdout.getvalue() == '0 stuck loans requeued\n'
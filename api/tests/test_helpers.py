@@ -0,0 +1,43 @@
+"""Test of api.helpers.
+"""
+from datetime import date
+
+import pytest
+
+from api.helpers import calculate_age_by_date, calculate_ages, convert_str_date_to_object
+
+
+def test_convert_str_date_to_object_should_return_date() -> None:
+    """Test if convert_str_date_to_object parses Y-m-d into a date.
+    """
+    assert convert_str_date_to_object(date='1990-01-31') == date(1990, 1, 31)
+
+
+@pytest.mark.parametrize('str_date', [
+    '1990-1-31',
+    '1990-02-30',
+    '19900131',
+    '1990-01-31T00:00',
+    '31/01/1990',
+    '１９９０-01-31',
+    '',
+])
+def test_convert_str_date_to_object_should_refuse_other_formats(str_date: str) -> None:
+    """Test if convert_str_date_to_object refuses anything but valid Y-m-d dates.
+
+    :param str_date: an invalid date
+    """
+    with pytest.raises(ValueError):
+        convert_str_date_to_object(date=str_date)
+
+
+def test_calculate_ages_should_match_calculate_age_by_date() -> None:
+    """Test if calculate_ages computes each age against the same reference date.
+    """
+    today = date(2020, 2, 29)
+    birthdates = [date(2002, 2, 28), date(2002, 3, 1), date(2000, 2, 29), date(1990, 12, 31)]
+
+    assert calculate_ages(birthdates, today=today) == [18, 17, 20, 29]
+    assert calculate_ages(birthdates, today=today) == [
+        calculate_age_by_date(birthdate, today=today) for birthdate in birthdates
+    ]
@@ -0,0 +1,94 @@
+"""Test of api.interest_index.
+"""
+from decimal import Decimal
+from typing import Any, Callable, Tuple
+
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+from mixer.backend.django import mixer
+
+from api import logic
+from api.interest_index import VERSION_CACHE_KEY, InterestIndex
+
+
+@pytest.mark.django_db()
+def test_interest_index_should_pick_lowest_overlapping_rate() -> None:  # noqa: WPS
+    """Test if interest index picks the lowest rate among overlapping ranges.
+    """
+    mixer.blend('api.interest', min_score=600, max_score=799, terms=6, percentage=Decimal('0.06'))
+    mixer.blend('api.interest', min_score=700, max_score=899, terms=6, percentage=Decimal('0.05'))
+    index = InterestIndex()
+
+    assert index.get_rate(score=650, terms=6) == Decimal('0.06')  # noqa: WPS432
+    assert index.get_rate(score=750, terms=6) == Decimal('0.05')  # noqa: WPS432
+    assert index.get_rate(score=899, terms=6) == Decimal('0.05')  # noqa: WPS432
+    assert index.get_rate(score=900, terms=6) is None  # noqa: WPS432
+    assert index.get_rate(score=599, terms=6) is None  # noqa: WPS432
+    assert index.get_rate(score=700, terms=9) is None  # noqa: WPS432
+
+
+@pytest.mark.django_db()
+def test_get_proposal_terms_should_not_query_when_loaded(  # noqa: WPS118
+    interests: str,
+    loans: Tuple,
+    django_assert_num_queries: Callable,
+) -> None:
+    """Test if get_proposal_terms makes no query after index is loaded.
+
+    :param interests: a fixture that initialiazes loaddata of interests
+    :param loans: a fixture that contains a immutable list of loans
+    :param django_assert_num_queries: fixture that counts queries
+    """
+    loan = loans[-1]
+    loan.score = 600
+    logic.get_all_terms()
+    with django_assert_num_queries(0):
+        terms = logic.get_proposal_terms(loan=loan, commitment=Decimal('0.8'))
+
+    assert terms == 12  # noqa: WPS432
+    assert interests == 'interests'
+
+
+@pytest.mark.django_db()
+def test_interest_index_should_reload_after_save(interests: str) -> None:  # noqa: WPS
+    """Test if interest index reloads after an interest is saved.
+
+    :param interests: a fixture that initialiazes loaddata of interests
+    """
+    assert logic.get_all_terms() == [6, 9, 12]
+    mixer.blend('api.interest', min_score=600, max_score=1000, terms=24, percentage=Decimal('0.1'))
+
+    assert logic.get_all_terms() == [6, 9, 12, 24]
+    assert logic.get_interest_rate(score=600, terms=24) == Decimal('0.1')  # noqa: WPS432
+    assert interests == 'interests'
+
+
+@pytest.mark.django_db()
+def test_interest_snapshot_should_retrieve_rate_table(interests: str) -> None:  # noqa: WPS
+    """Test if interest snapshot retrieves the rates of every term for a score.
+
+    :param interests: a fixture that initialiazes loaddata of interests
+    """
+    snapshot = InterestIndex().snapshot()
+
+    assert snapshot.get_rate_table(750) == (  # noqa: WPS432
+        (6, Decimal('0.055')),
+        (9, Decimal('0.058')),
+        (12, Decimal('0.061')),
+    )
+    assert snapshot.get_rate_table(500) == ((6, None), (9, None), (12, None))  # noqa: WPS432
+    assert interests == 'interests'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_interest_index_should_bump_version_on_commit(locmem_cache: Any) -> None:  # noqa: WPS
+    """Test if the shared version is only bumped once the interest change is committed.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    """
+    with transaction.atomic():
+        mixer.blend('api.interest', min_score=600, max_score=1000, terms=24)
+        assert cache.get(VERSION_CACHE_KEY) is None
+
+    assert cache.get(VERSION_CACHE_KEY) == 1
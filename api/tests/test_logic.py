@@ -1,13 +1,22 @@
 """logic.py unit tests.
 """
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from decimal import Decimal
-from typing import Tuple
+from threading import Barrier
+from typing import Any, List, Tuple
 
 import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 from pytest_mock.plugin import MockerFixture
 
 from api import logic
 from api.logic import APIException, CommitmentService, ScoreService, ValidationError
+from api.models import Loan, Policy
 
 
 @pytest.mark.django_db()
@@ -143,7 +152,10 @@ def test_start_score_policy_should_validate_score(policies: Tuple, mocker: Mocke
     expected_response = {'score': 701}
     mocked_service = mocker.patch.object(ScoreService, 'request', return_value=expected_response)
     processed_loan = logic.start_score_policy(loan_id=str(policy.loan.id))
-    mocked_service.assert_called_once_with(request_data={'cpf': policy.loan.cpf})
+    mocked_service.assert_called_once_with(
+        request_data={'cpf': policy.loan.cpf},
+        deadline=None,
+    )
 
     assert processed_loan.state == 'processing_commitment'
     assert processed_loan.score == expected_response.get('score')
@@ -165,7 +177,10 @@ def test_start_score_policy_should_handle_validation_error(  # noqa: WPS118
     expected_response = {'score': 100}
     mocked_service = mocker.patch.object(ScoreService, 'request', return_value=expected_response)
     loan = logic.start_score_policy(loan_id=str(policy.loan.id))
-    mocked_service.assert_called_once_with(request_data={'cpf': policy.loan.cpf})
+    mocked_service.assert_called_once_with(
+        request_data={'cpf': policy.loan.cpf},
+        deadline=None,
+    )
     assert loan.refused_policy == 'score'
 
 
@@ -186,7 +201,10 @@ def test_start_score_policy_should_handle_api_exception(  # noqa: WPS118
     with pytest.raises(APIException, match='A'):
         logic.start_score_policy(loan_id=str(policy.loan.id))
 
-    mocked_service.assert_called_once_with(request_data={'cpf': policy.loan.cpf})
+    mocked_service.assert_called_once_with(
+        request_data={'cpf': policy.loan.cpf},
+        deadline=None,
+    )
 
 
 @pytest.mark.django_db()
@@ -213,7 +231,10 @@ def test_start_commitment_policy_should_validate_commitment(   # noqa: WPS118
         return_value=expected_response,
     )
     loan = logic.start_commitment_policy(loan_id=str(policy.loan.id))
-    mocked_service.assert_called_once_with(request_data={'cpf': policy.loan.cpf})
+    mocked_service.assert_called_once_with(
+        request_data={'cpf': policy.loan.cpf},
+        deadline=None,
+    )
     assert loan.state == 'approved'
     assert interests == 'interests'
 
@@ -231,13 +252,17 @@ def test_start_commitment_policy_should_handle_validation_error(  # noqa: WPS118
     :param mocker: fixture that contains Mock utility
     """
     policy = policies[-1]
+    Loan.objects.filter(pk=policy.loan.id).update(state='processing_commitment')
     mocked_service = mocker.patch.object(
         CommitmentService,
         'request',
         return_value={'commitment': Decimal('0.99')},
     )
     loan = logic.start_commitment_policy(loan_id=str(policy.loan.id))
-    mocked_service.assert_called_once_with(request_data={'cpf': policy.loan.cpf})
+    mocked_service.assert_called_once_with(
+        request_data={'cpf': policy.loan.cpf},
+        deadline=None,
+    )
     assert loan.state == 'refused'
     assert loan.refused_policy == 'commitment'
     assert interests == 'interests'
@@ -256,6 +281,7 @@ def test_start_commitment_policy_should_handle_api_exception(  # noqa: WPS118
     :param mocker: fixture that contains Mock utility
     """
     policy = policies[-1]
+    Loan.objects.filter(pk=policy.loan.id).update(state='processing_commitment')
     mocked_service = mocker.patch.object(
         CommitmentService,
         'request',
@@ -265,4 +291,319 @@ def test_start_commitment_policy_should_handle_api_exception(  # noqa: WPS118
         logic.start_commitment_policy(loan_id=str(policy.loan.id))
 
     assert interests == 'interests'
-    mocked_service.assert_called_once_with(request_data={'cpf': policy.loan.cpf})
+    mocked_service.assert_called_once_with(
+        request_data={'cpf': policy.loan.cpf},
+        deadline=None,
+    )
+
+
+@pytest.mark.django_db()
+def test_get_bulk_proposal_terms_should_retrieve_result(interests: str, loans: Tuple) -> None:  # noqa
+    """Test if get_bulk_proposal_terms should retrieve result for every loan.
+
+    :param interests: a fixture that initialiazes loaddata of interests
+    :param loans: a fixture that contains a immutable list of loans
+    """
+    approved_loan, refused_loan = loans[-1], loans[-2]
+    for loan in (approved_loan, refused_loan):
+        loan.score = 600
+        loan.commitment = Decimal('0.8')
+
+    proposal_terms = logic.get_bulk_proposal_terms([approved_loan, refused_loan])
+
+    assert proposal_terms == {approved_loan.id: 12, refused_loan.id: None}
+    assert interests == 'interests'
+
+
+@pytest.mark.django_db()
+def test_get_bulk_proposal_terms_should_skip_loans_without_decision_data(  # noqa: WPS118
+    interests: str,
+    loans: Tuple,
+) -> None:
+    """Test if get_bulk_proposal_terms maps loans with no score or commitment to None.
+
+    :param interests: a fixture that initialiazes loaddata of interests
+    :param loans: a fixture that contains a immutable list of loans
+    """
+    no_score_loan, no_commitment_loan = loans[-1], loans[-2]
+    no_score_loan.score, no_score_loan.commitment = None, None
+    no_commitment_loan.score, no_commitment_loan.commitment = 600, None
+
+    proposal_terms = logic.get_bulk_proposal_terms([no_score_loan, no_commitment_loan])
+
+    assert proposal_terms == {no_score_loan.id: None, no_commitment_loan.id: None}
+    assert interests == 'interests'
+
+
+def test_fetch_score_and_commitment_should_not_queue_concurrent_calls(  # noqa: WPS118
+    mocker: MockerFixture,
+) -> None:
+    """Test if concurrent callers fetch at the same time instead of sharing a few threads.
+
+    :param mocker: fixture that contains Mock utility
+    """
+    callers = 4
+    barrier = Barrier(callers * 2, timeout=5)
+
+    def fetch(service_class: Any, cpf: str) -> dict:  # noqa: WPS430
+        barrier.wait()
+        return {'cpf': cpf}
+
+    mocker.patch.object(logic, '_fetch', side_effect=fetch)
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        responses = list(executor.map(logic.fetch_score_and_commitment, ['1', '2', '3', '4']))
+
+    assert responses[0] == ({'cpf': '1'}, {'cpf': '1'})
+    assert len(responses) == callers
+
+
+@pytest.mark.django_db()
+def test_start_score_and_commitment_policies_should_approve(  # noqa: WPS118
+    loans: Tuple,
+    mocker: MockerFixture,
+    interests: str,
+) -> None:
+    """Test if start_score_and_commitment_policies approves with both responses.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    :param interests: a loaddata setup fixture
+    """
+    loan = logic.start_age_policy(loan_id=str(loans[-1].id))
+    mocked_score = mocker.patch.object(ScoreService, 'request', return_value={'score': 701})
+    mocked_commitment = mocker.patch.object(
+        CommitmentService,
+        'request',
+        return_value={'commitment': Decimal('0.2')},
+    )
+    loan = logic.start_score_and_commitment_policies(loan_id=str(loan.id))
+
+    mocked_score.assert_called_once_with(request_data={'cpf': loan.cpf})
+    mocked_commitment.assert_called_once_with(request_data={'cpf': loan.cpf})
+    assert loan.state == 'approved'
+    assert interests == 'interests'
+
+
+@pytest.mark.django_db()
+def test_start_score_and_commitment_policies_should_discard_commitment(  # noqa: WPS118
+    loans: Tuple,
+    mocker: MockerFixture,
+) -> None:
+    """Test if start_score_and_commitment_policies discards commitment on score refusal.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    """
+    loan = logic.start_age_policy(loan_id=str(loans[-1].id))
+    mocker.patch.object(ScoreService, 'request', return_value={'score': 100})
+    mocker.patch.object(CommitmentService, 'request', side_effect=APIException('A'))
+    loan = logic.start_score_and_commitment_policies(loan_id=str(loan.id))
+
+    assert loan.state == 'refused'
+    assert loan.refused_policy == 'score'
+    assert not loan.policies.filter(name='commitment').exists()
+
+
+@pytest.mark.django_db()
+def test_start_credit_analysis_should_approve(  # noqa: WPS118
+    loans: Tuple,
+    mocker: MockerFixture,
+    interests: str,
+) -> None:
+    """Test if start_credit_analysis runs every policy until approval.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    :param interests: a loaddata setup fixture
+    """
+    mocker.patch.object(ScoreService, 'request', return_value={'score': 701})
+    mocker.patch.object(
+        CommitmentService,
+        'request',
+        return_value={'commitment': Decimal('0.2')},
+    )
+    loan = logic.start_credit_analysis(loan_id=str(loans[-1].id))
+
+    assert loan.state == 'approved'
+    assert loan.proposal.terms == 12  # noqa: WPS432
+    assert interests == 'interests'
+
+
+@pytest.mark.django_db()
+def test_start_credit_analysis_should_short_circuit_on_refusal(  # noqa: WPS118
+    loans: Tuple,
+    mocker: MockerFixture,
+) -> None:
+    """Test if start_credit_analysis stops at the first refused policy.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    """
+    mocked_score = mocker.patch.object(ScoreService, 'request')
+    loan = logic.start_credit_analysis(loan_id=str(loans[0].id))
+
+    mocked_score.assert_not_called()
+    assert loan.state == 'refused'
+    assert loan.refused_policy == 'age'
+
+
+@pytest.mark.django_db()
+def test_run_credit_analysis_should_bound_requests_by_deadline(  # noqa: WPS118
+    loans: Tuple,
+    mocker: MockerFixture,
+    interests: str,
+) -> None:
+    """Test if run_credit_analysis hands its deadline to each external request.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    :param interests: a loaddata setup fixture
+    """
+    mocked_score = mocker.patch.object(ScoreService, 'request', return_value={'score': 701})
+    mocked_commitment = mocker.patch.object(
+        CommitmentService,
+        'request',
+        return_value={'commitment': Decimal('0.2')},
+    )
+    deadline = time.monotonic() + 60
+    loan = logic.run_credit_analysis(logic.get_loan(loans[-1].id), deadline=deadline)
+
+    mocked_score.assert_called_once_with(request_data={'cpf': loan.cpf}, deadline=deadline)
+    mocked_commitment.assert_called_once_with(request_data={'cpf': loan.cpf}, deadline=deadline)
+    assert loan.state == 'approved'
+    assert interests == 'interests'
+
+
+def _list_statements(context: CaptureQueriesContext) -> List[str]:
+    """Lists the statements run, ignoring savepoints of test transactions.
+
+    :param context: a context that captured queries
+    :return: a list with first word of each statement
+    """
+    return [
+        query['sql'].split()[0]
+        for query in context.captured_queries
+        if 'SAVEPOINT' not in query['sql']
+    ]
+
+
+@pytest.mark.django_db()
+def test_policy_steps_should_write_once(  # noqa: WPS118
+    loans: Tuple,
+    mocker: MockerFixture,
+    interests: str,
+) -> None:
+    """Test the exact statements of each policy step on a loaded loan.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    :param interests: a loaddata setup fixture
+    """
+    mocker.patch.object(ScoreService, 'request', return_value={'score': 701})
+    mocker.patch.object(
+        CommitmentService,
+        'request',
+        return_value={'commitment': Decimal('0.2')},
+    )
+    loan, refused_loan = logic.get_loan(loans[-1].id), logic.get_loan(loans[0].id)
+    logic.get_all_terms()
+    steps = (
+        (lambda: logic.run_age_policy(loan), ['UPDATE', 'INSERT']),
+        (lambda: logic.run_score_policy(loan), ['UPDATE', 'INSERT']),
+        (lambda: logic.run_commitment_policy(loan), ['UPDATE', 'INSERT', 'INSERT']),
+        (lambda: logic.run_age_policy(refused_loan), ['UPDATE', 'INSERT']),
+    )
+    for step, expected_statements in steps:
+        with CaptureQueriesContext(connection) as context:
+            step()
+        assert _list_statements(context) == expected_statements
+
+    assert logic.get_loan(loan.id).state == 'approved'
+    assert logic.get_loan(refused_loan.id).result == 'refused'
+    assert interests == 'interests'
+
+
+@pytest.mark.django_db()
+def test_policy_steps_should_be_idempotent(
+    loans: Tuple,
+    mocker: MockerFixture,
+) -> None:
+    """Test if replayed and concurrent deliveries of a step write a single policy.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    """
+    mocked_service = mocker.patch.object(ScoreService, 'request', return_value={'score': 701})
+    loan = logic.start_age_policy(str(loans[-1].id))
+    concurrent_loan = logic.get_loan(loan.id)
+    logic.start_score_policy(str(loan.id))
+    logic.start_score_policy(str(loan.id))
+    logic.start_age_policy(str(loan.id))
+    logic.run_score_policy(concurrent_loan)
+
+    assert mocked_service.call_count == 2
+    assert concurrent_loan.state == 'processing_commitment'
+    policy_names = Policy.objects.filter(loan=loan).order_by('id').values_list('name', flat=True)
+    assert list(policy_names) == ['age', 'score']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_get_loan_detail_should_not_cache_a_step_committed_mid_read(  # noqa: WPS118
+    loans: Tuple,
+    locmem_cache: Any,
+) -> None:
+    """Test if a processing detail read just before a step commits is not served afterwards.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param locmem_cache: fixture that enables a local memory cache
+    """
+    loan = loans[0]
+    steps = [lambda: logic.run_age_policy(loan)]
+
+    def commit_step_after_read(execute: Any, sql: str, *args: Any) -> Any:  # noqa: WPS430
+        result = execute(sql, *args)
+        if steps and sql.startswith('SELECT'):
+            steps.pop()()
+        return result
+
+    with connection.execute_wrapper(commit_step_after_read):
+        assert logic.get_loan_detail(loan.id)['status'] == 'processing'
+
+    loan_detail = logic.get_loan_detail(loan.id)
+
+    assert loan_detail['status'] == 'completed'
+    assert loan_detail['refused_policy'] == 'age'
+    assert cache.get(logic.get_loan_detail_cache_key(loan.id)) == loan_detail
+
+
+@pytest.mark.django_db()
+def test_start_age_policies_should_write_batch_at_once(loans: Tuple) -> None:
+    """Test if a batch of age policies is loaded, inserted and updated in one statement each.
+
+    :param loans: a fixture that contains a immutable list of loans
+    """
+    loan_ids = [str(loan.id) for loan in loans]
+    with CaptureQueriesContext(connection) as context:
+        processed = logic.start_age_policies(loan_ids)
+
+    assert _list_statements(context) == ['SELECT', 'INSERT', 'UPDATE']
+    assert {loan.id: loan.state for loan in processed} == {
+        loan.id: 'refused' if loan.birthdate.year == 2020 else 'processing_score'
+        for loan in loans
+    }
+    assert Policy.objects.filter(loan_id__in=loan_ids, name='age').count() == len(loans)
+    assert logic.start_age_policies(loan_ids) == []
+
+
+@pytest.mark.django_db()
+def test_iter_stuck_loan_ids_should_page_through_equal_creation_dates(loans: Tuple) -> None:
+    """Test if loans created at the same time are all yielded across batches.
+
+    :param loans: a fixture that contains a immutable list of loans
+    """
+    created_at = timezone.now() - timedelta(hours=2)
+    Loan.objects.update(created_at=created_at)
+    batches = list(logic.iter_stuck_loan_ids('processing_age', timezone.now(), batch_size=3))
+
+    assert [len(batch) for batch in batches] == [3, 1]
+    assert {loan_id for batch in batches for loan_id in batch} == {loan.id for loan in loans}
@@ -1,9 +1,12 @@
 """Test of api.models.
 """
 from decimal import Decimal
-from typing import Tuple
+from typing import Callable, Tuple
 
 import pytest
+from transitions import MachineError
+
+from api.state_machine import get_loan_machine
 
 
 @pytest.mark.django_db
@@ -111,3 +114,45 @@ def test_loan_should_not_process_score(loans: Tuple) -> None:  # noqa: WPS218
     assert loan2.status == 'processing'
     assert loan2.state == 'processing_score'
     assert loan2.result is None
+
+
+@pytest.mark.django_db
+def test_loan_should_check_policy_with_single_query(  # noqa: WPS118
+    policies: Tuple,
+    django_assert_num_queries: Callable,
+) -> None:
+    """Test if loan checks a policy with one query, and none once recorded.
+
+    :param policies: a fixture that contains a immutable list of policies.
+    :param django_assert_num_queries: fixture that counts queries
+    """
+    loan = policies[0].loan
+    with django_assert_num_queries(1):
+        assert loan.should_process_age()
+
+    loan.record_policy('score', passed=True)
+    loan.score = 600
+    with django_assert_num_queries(0):
+        assert loan.should_process_age()
+        assert loan.should_process_score()
+
+    loan.record_policy('score', passed=False)
+    with django_assert_num_queries(1):
+        assert loan.should_process_score()
+
+
+@pytest.mark.django_db
+def test_loans_should_share_compiled_machine(loans: Tuple) -> None:
+    """Test if loans share one machine and keep their own state.
+
+    :param loans: a fixture that contains a immutable list of loans.
+    """
+    loan1, loan2 = loans[-1], loans[-2]
+    loan1.refused_policy = 'age'
+    loan1.refuse()
+
+    assert get_loan_machine() is get_loan_machine()
+    assert loan1.state == 'refused'
+    assert loan2.state == 'processing_age'
+    with pytest.raises(MachineError):
+        loan1.process_age()
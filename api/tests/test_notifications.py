@@ -0,0 +1,75 @@
+"""Test notifications.
+"""
+import asyncio
+from typing import Any
+from uuid import uuid4
+
+import redis
+from pytest_mock.plugin import MockerFixture
+
+from api import notifications
+
+
+def test_wait_loan_completed_should_return_on_message(  # noqa: WPS118
+    mocker: MockerFixture,
+    settings: Any,
+) -> None:
+    """Test if wait_loan_completed returns once a completion is published.
+
+    :param mocker: fixture that contains Mock utility
+    :param settings: django settings fixture
+    """
+    settings.LOAN_STATUS_REDIS_URL = 'redis://localhost:6379/2'
+    loan_id = uuid4()
+    pubsub = mocker.AsyncMock()
+    pubsub.get_message.side_effect = [None, {'type': 'message', 'data': b'completed'}]
+    client = mocker.MagicMock()
+    client.pubsub.return_value = pubsub
+    mocker.patch.object(notifications, '_get_async_client', return_value=client)
+    is_completed = mocker.AsyncMock(return_value=False)
+
+    asyncio.run(notifications.wait_loan_completed(loan_id, 5, is_completed))
+
+    pubsub.subscribe.assert_awaited_once_with(notifications.get_channel(loan_id))
+    assert pubsub.get_message.await_count == 2
+    pubsub.close.assert_awaited_once()
+
+
+def test_wait_loan_completed_should_return_on_redis_error(  # noqa: WPS118
+    mocker: MockerFixture,
+    settings: Any,
+) -> None:
+    """Test if wait_loan_completed gives up waiting, instead of raising, when redis fails.
+
+    :param mocker: fixture that contains Mock utility
+    :param settings: django settings fixture
+    """
+    settings.LOAN_STATUS_REDIS_URL = 'redis://localhost:6379/2'
+    pubsub = mocker.AsyncMock()
+    pubsub.subscribe.side_effect = redis.ConnectionError('Connection refused')
+    pubsub.unsubscribe.side_effect = redis.ConnectionError('Connection refused')
+    client = mocker.MagicMock()
+    client.pubsub.return_value = pubsub
+    mocker.patch.object(notifications, '_get_async_client', return_value=client)
+    is_completed = mocker.AsyncMock(return_value=False)
+
+    asyncio.run(notifications.wait_loan_completed(uuid4(), 5, is_completed))
+
+    is_completed.assert_not_awaited()
+    pubsub.close.assert_awaited_once()
+
+
+def test_publish_loan_completed_should_publish(mocker: MockerFixture, settings: Any) -> None:
+    """Test if publish_loan_completed publishes on the loan channel.
+
+    :param mocker: fixture that contains Mock utility
+    :param settings: django settings fixture
+    """
+    settings.LOAN_STATUS_REDIS_URL = 'redis://localhost:6379/2'
+    loan_id = uuid4()
+    client = mocker.MagicMock()
+    mocker.patch.object(notifications, '_get_client', return_value=client)
+
+    notifications.publish_loan_completed(loan_id)
+
+    client.publish.assert_called_once_with(notifications.get_channel(loan_id), 'completed')
@@ -0,0 +1,49 @@
+"""Test of api.schemas.
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from api.schemas import PostLoanRequest
+
+REQUEST_DATA = {
+    'name': 'Fulano de Tal',
+    'cpf': '26443567099',
+    'birthdate': '1990-01-31',
+    'amount': '1000.50',
+    'terms': 12,
+    'income': 2000.1,
+}
+
+
+def test_post_loan_request_should_convert_values() -> None:
+    """Test if PostLoanRequest returns the request values already typed.
+    """
+    assert PostLoanRequest.validate(REQUEST_DATA) == {
+        'name': 'Fulano de Tal',
+        'cpf': '26443567099',
+        'birthdate': date(1990, 1, 31),
+        'amount': Decimal('1000.50'),
+        'terms': 12,
+        'income': Decimal('2000.1'),
+    }
+
+
+@pytest.mark.parametrize(('request_data', 'message'), [
+    ({**REQUEST_DATA, 'cpf': '26443567098'}, "Key 'cpf' error: Invalid CPF"),
+    ({**REQUEST_DATA, 'birthdate': '31/01/1990'}, "Key 'birthdate' error: Invalid date format"),
+    ({**REQUEST_DATA, 'amount': 'a lot'}, "Key 'amount' error: invalid value 'a lot'"),
+    ({**REQUEST_DATA, 'terms': 0}, "Key 'terms' error: should be greater or equal than 1"),
+    ({**REQUEST_DATA, 'extra': 1}, 'Wrong keys extra'),
+    ({'name': 'Fulano de Tal'}, "Missing key: 'cpf'"),
+])
+def test_post_loan_request_should_refuse_invalid_data(request_data: dict, message: str) -> None:
+    """Test if PostLoanRequest refuses missing, unknown and invalid fields.
+
+    :param request_data: a request body
+    :param message: the expected error message
+    """
+    with pytest.raises(ValidationError, match=message):
+        PostLoanRequest.validate(request_data)
@@ -1,10 +1,18 @@
 """Test services.
 """
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import Any, Generator, List
 
+import pytest
+import requests
+from django.core.cache import cache
 from pytest_mock.plugin import MockerFixture
-from rest_framework import status
+from rest_framework import exceptions, status
 
 from api import services
 
@@ -23,11 +31,16 @@ def test_score_service_should_get_succesfull_response(mocker: MockerFixture) ->
     mocked_response = mocker.MagicMock()
     mocked_response.status_code = status.HTTP_200_OK
     mocked_response.json.return_value = expected_response
-    mocked_request = mocker.patch('api.services.requests.post', return_value=mocked_response)
+    mocked_request = mocker.patch.object(
+        services.session_pool,
+        'post',
+        return_value=mocked_response,
+    )
     service = services.ScoreService()
     response = service.request(request_data=request_data)
     mocked_request.assert_called_once_with(
         service.url,
+        timeout=services.session_pool.timeout,
         data=json.dumps(request_data),
         headers=service.headers,
     )
@@ -48,13 +61,573 @@ def test_commitment_service_should_get_succesfull_response(mocker: MockerFixture
     mocked_response = mocker.MagicMock()
     mocked_response.status_code = status.HTTP_200_OK
     mocked_response.json.return_value = expected_response
-    mocked_request = mocker.patch('api.services.requests.post', return_value=mocked_response)
+    mocked_request = mocker.patch.object(
+        services.session_pool,
+        'post',
+        return_value=mocked_response,
+    )
     service = services.CommitmentService()
     response = service.request(request_data=request_data)
     mocked_request.assert_called_once_with(
         service.url,
+        timeout=services.session_pool.timeout,
         data=json.dumps(request_data),
         headers=service.headers,
     )
 
     assert Decimal(expected_response.get('commitment')) == Decimal(response.get('commitment'))
+
+
+def test_session_pool_should_reuse_session(mocker: MockerFixture) -> None:
+    """Test if session pool reuses the same session between requests.
+
+    :param mocker: fixture that contains Mock utility
+    """
+    pool = services.SessionPool()
+    mocked_post = mocker.patch.object(requests.Session, 'post')
+    session = pool.get_session()
+    pool.post('http://localhost/score', data='{}')
+    pool.post('http://localhost/score', data='{}')
+
+    assert pool.get_session() is session
+    assert mocked_post.call_count == 2
+    mocked_post.assert_called_with('http://localhost/score', timeout=pool.timeout, data='{}')
+    assert pool.metrics()['sessions'] == 1
+    assert pool.metrics()['requests'] == 2
+    pool.close()
+
+
+def test_session_pool_metrics_should_not_open_pools() -> None:  # noqa: WPS118
+    """Test if reading session pool metrics does not create connection pools.
+    """
+    pool = services.SessionPool()
+    session = pool.get_session()
+
+    assert pool.metrics()['connections'] == 0
+    assert not session.get_adapter('http://localhost').poolmanager.pools.keys()
+    pool.close()
+
+
+def test_counters_should_count_across_threads() -> None:  # noqa: WPS118
+    """Test if counters keep every increment of concurrent threads.
+    """
+    counters = services.Counters('requests')
+
+    def count(_: int) -> None:  # noqa: WPS430
+        for _index in range(1000):
+            counters.incr('requests')
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(count, range(8)))
+
+    assert counters.as_dict() == {'requests': 8000}
+
+
+def test_score_service_should_raise_api_exception_on_timeout(mocker: MockerFixture) -> None:
+    """Test if score service raises APIException when server times out.
+
+    :param mocker: fixture that contains Mock utility
+    """
+    mocker.patch.object(requests.Session, 'post', side_effect=requests.Timeout('timed out'))
+    with pytest.raises(exceptions.APIException, match='Unable to reach server'):
+        services.ScoreService().request(request_data={'cpf': '72456336062'})
+
+
+def test_score_service_should_serve_cached_response(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if score service serves the second request from cache.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    mocked_response = mocker.MagicMock()
+    mocked_response.status_code = status.HTTP_200_OK
+    mocked_response.json.return_value = {'score': 701}
+    mocked_request = mocker.patch.object(
+        services.session_pool,
+        'post',
+        return_value=mocked_response,
+    )
+    hits = services.response_cache.metrics()['hits']
+    first = services.ScoreService().request(request_data={'cpf': '72456336062'})
+    second = services.ScoreService().request(request_data={'cpf': '72456336062'})
+
+    assert first == second == {'score': 701}
+    assert mocked_request.call_count == 1
+    assert services.response_cache.metrics()['hits'] == hits + 1
+
+
+def test_response_cache_should_not_fetch_response_stored_by_previous_flight(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if a caller that missed the cache reuses a response stored before its flight.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    single_flight_do = services.single_flight.do
+
+    def do_after_previous_flight(key: str, fetch: Any, deadline: Any = None) -> Any:  # noqa: WPS430
+        cache.set(key, (status.HTTP_200_OK, {'score': 701}), timeout=60)
+        return single_flight_do(key, fetch, deadline=deadline)
+
+    mocker.patch.object(services.single_flight, 'do', side_effect=do_after_previous_flight)
+    mocked_request = mocker.patch.object(services.session_pool, 'post')
+    metrics = services.response_cache.metrics()
+    response = services.ScoreService().request(request_data={'cpf': '72456336062'})
+
+    assert response == {'score': 701}
+    assert mocked_request.call_count == 0
+    assert services.response_cache.metrics() == {
+        'hits': metrics['hits'] + 1,
+        'misses': metrics['misses'],
+    }
+
+
+@pytest.mark.parametrize(('status_code', 'expected_calls'), [
+    (status.HTTP_404_NOT_FOUND, 1),
+    (status.HTTP_503_SERVICE_UNAVAILABLE, 2),
+])
+def test_score_service_should_negative_cache_client_errors(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+    status_code: int,
+    expected_calls: int,
+) -> None:
+    """Test if score service caches 4xx but not 5xx responses.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    :param status_code: upstream status code
+    :param expected_calls: expected upstream calls for two requests
+    """
+    mocked_response = mocker.MagicMock()
+    mocked_response.status_code = status_code
+    mocked_request = mocker.patch.object(
+        services.session_pool,
+        'post',
+        return_value=mocked_response,
+    )
+    for _ in range(2):
+        with pytest.raises(exceptions.APIException, match='Unexpected response from server'):
+            services.ScoreService().request(request_data={'cpf': '72456336062'})
+
+    assert mocked_request.call_count == expected_calls
+
+
+def test_circuit_breaker_should_open_and_close_after_probe(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if repeated failures open the circuit and a successful probe closes it.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    locmem_cache.EXTERNAL_API_CIRCUIT_FAILURES = 2
+    mocked_response = mocker.MagicMock()
+    mocked_response.status_code = status.HTTP_200_OK
+    mocked_response.json.return_value = {'score': 701}
+    mocked_request = mocker.patch.object(
+        services.session_pool,
+        'post',
+        side_effect=[requests.ConnectionError('down')] * 2 + [mocked_response],
+    )
+    breaker = services.circuit_breaker
+    opened = breaker.metrics()['opened']
+    for _ in range(2):
+        with pytest.raises(exceptions.APIException, match='Unable to reach server'):
+            services.ScoreService().request(request_data={'cpf': '72456336062'})
+    with pytest.raises(exceptions.APIException, match='Circuit open for score service'):
+        services.ScoreService().request(request_data={'cpf': '72456336062'})
+
+    assert breaker.get_state('score') == 'open'
+    assert breaker.metrics()['opened'] == opened + 1
+    assert mocked_request.call_count == 2
+
+    cache.delete('api:circuit:score:open')
+    assert breaker.get_state('score') == 'half_open'
+    assert services.ScoreService().request(request_data={'cpf': '72456336062'}) == {'score': 701}
+    assert breaker.get_state('score') == 'closed'
+
+
+def test_circuit_breaker_should_open_on_connection_errors_within_budget(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if connection errors of calls with a short budget still open the circuit.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    locmem_cache.EXTERNAL_API_CIRCUIT_FAILURES = 2
+    mocker.patch.object(
+        services.session_pool,
+        'post',
+        side_effect=requests.ConnectionError('connection refused'),
+    )
+    for _ in range(2):
+        with pytest.raises(exceptions.APIException, match='Unable to reach server'):
+            services.ScoreService().request(
+                request_data={'cpf': '72456336062'},
+                deadline=time.monotonic() + 2,
+            )
+
+    assert services.circuit_breaker.get_state('score') == 'open'
+
+
+def test_circuit_breaker_should_reopen_on_failed_probe_within_budget(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if a probe with a short budget reopens the circuit on connection errors.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    cache.set('api:circuit:score:tripped', 1, timeout=None)
+    mocker.patch.object(
+        services.session_pool,
+        'post',
+        side_effect=requests.ConnectionError('connection refused'),
+    )
+    with pytest.raises(exceptions.APIException, match='Unable to reach server'):
+        services.ScoreService().request(
+            request_data={'cpf': '72456336062'},
+            deadline=time.monotonic() + 2,
+        )
+
+    assert services.circuit_breaker.get_state('score') == 'open'
+
+
+def test_circuit_breaker_should_not_count_timeouts_cut_by_budget(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if timeouts on a timeout shortened to the budget are not failures.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    cache.set('api:circuit:score:tripped', 1, timeout=None)
+    mocker.patch.object(services.session_pool, 'post', side_effect=requests.Timeout('timed out'))
+    with pytest.raises(exceptions.APIException, match='Unable to reach server'):
+        services.ScoreService().request(
+            request_data={'cpf': '72456336062'},
+            deadline=time.monotonic() + 2,
+        )
+
+    assert services.circuit_breaker.get_state('score') == 'half_open'
+    assert services.circuit_breaker.get_failures('score') == 0
+
+
+def test_rate_limiter_should_throttle_over_limit(
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if rate limiter rejects calls over the per second limit.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    mocker.patch('api.services.time.time', return_value=1000.5)
+    locmem_cache.EXTERNAL_API_RATE_LIMIT = 1
+    locmem_cache.EXTERNAL_API_RATE_LIMIT_WAIT = 0
+    services.rate_limiter.acquire('score')
+    with pytest.raises(exceptions.APIException, match='Rate limit exceeded for score service'):
+        services.rate_limiter.acquire('score')
+
+
+def test_rate_limiter_should_adapt_to_circuit_failures(locmem_cache: Any) -> None:  # noqa: WPS
+    """Test if rate limiter lowers the limit as the circuit counts failures.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    """
+    locmem_cache.EXTERNAL_API_RATE_LIMIT = 50
+    locmem_cache.EXTERNAL_API_CIRCUIT_FAILURES = 10
+    limits = [services.rate_limiter.get_limit('score')]
+    for _ in range(4):
+        services.circuit_breaker.record_failure('score')
+        limits.append(services.rate_limiter.get_limit('score'))
+
+    assert limits == [50, 25, 16, 12, 10]
+
+
+def test_circuit_breaker_should_keep_probe_of_throttled_call(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if a half-open call rejected by the rate limiter leaves the probe to the next one.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    locmem_cache.EXTERNAL_API_RATE_LIMIT = 1
+    locmem_cache.EXTERNAL_API_RATE_LIMIT_WAIT = 0
+    mocked_time = mocker.patch('api.services.time.time', return_value=1000.5)
+    mocked_response = mocker.MagicMock()
+    mocked_response.status_code = status.HTTP_200_OK
+    mocked_response.json.return_value = {'score': 701}
+    mocker.patch.object(services.session_pool, 'post', return_value=mocked_response)
+    cache.set('api:circuit:score:tripped', 1)
+    services.rate_limiter.acquire('score')
+    with pytest.raises(exceptions.APIException, match='Rate limit exceeded for score service'):
+        services.ScoreService().request(request_data={'cpf': '72456336062'})
+
+    mocked_time.return_value = 1001.5
+    assert services.ScoreService().request(request_data={'cpf': '72456336062'}) == {'score': 701}
+    assert services.circuit_breaker.get_state('score') == 'closed'
+
+
+def test_score_service_should_cut_timeouts_to_deadline(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if a request cuts its timeouts to the deadline and a cut timeout is not a failure.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    mocked_request = mocker.patch.object(
+        services.session_pool,
+        'post',
+        side_effect=requests.ReadTimeout('read timed out'),
+    )
+    with pytest.raises(exceptions.APIException, match='Unable to reach server'):
+        services.ScoreService().request(
+            request_data={'cpf': '72456336062'},
+            deadline=time.monotonic() + 0.5,
+        )
+
+    assert max(mocked_request.call_args[1]['timeout']) <= 0.5  # noqa: WPS432
+    assert services.circuit_breaker.get_failures('score') == 0
+
+
+def test_score_service_should_stop_waiting_on_deadline(locmem_cache: Any) -> None:  # noqa: WPS
+    """Test if a caller waiting on a concurrent call gives up at its deadline.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    """
+    locmem_cache.EXTERNAL_API_CACHE_TTL = {}
+    cache.set('api:service:score:{"cpf": "72456336062"}:lock', 'flight')
+    started = time.monotonic()
+    with pytest.raises(exceptions.APIException, match='Latency budget exceeded'):
+        services.ScoreService().request(
+            request_data={'cpf': '72456336062'},
+            deadline=started + 0.2,
+        )
+
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.parametrize('upstream_error', [None, requests.ConnectionError('down')])
+def test_score_service_should_coalesce_concurrent_requests(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+    upstream_error: Any,
+) -> None:
+    """Test if concurrent requests share a single upstream call and its outcome.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    :param upstream_error: error raised by upstream, None for a response
+    """
+    locmem_cache.EXTERNAL_API_CACHE_TTL = {}
+    mocked_response = mocker.MagicMock()
+    mocked_response.status_code = status.HTTP_200_OK
+    mocked_response.json.return_value = {'score': 701}
+
+    def slow_post(*args: Any, **kwargs: Any) -> Any:  # noqa: WPS430
+        time.sleep(0.2)
+        if upstream_error is not None:
+            raise upstream_error
+        return mocked_response
+
+    mocked_request = mocker.patch.object(services.session_pool, 'post', side_effect=slow_post)
+
+    def request() -> Any:  # noqa: WPS430
+        try:
+            return services.ScoreService().request(request_data={'cpf': '72456336062'})
+        except exceptions.APIException as exception:
+            return str(exception)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outcomes = list(executor.map(lambda _: request(), range(4)))
+
+    assert mocked_request.call_count == 1
+    assert len({str(outcome) for outcome in outcomes}) == 1
+
+
+def test_score_service_should_not_share_errors_cut_by_leader_budget(  # noqa: WPS118
+    locmem_cache: Any,
+    mocker: MockerFixture,
+) -> None:
+    """Test if a waiter calls upstream itself when the leader runs out of budget.
+
+    :param locmem_cache: fixture that enables a local memory cache
+    :param mocker: fixture that contains Mock utility
+    """
+    locmem_cache.EXTERNAL_API_CACHE_TTL = {}
+    mocked_response = mocker.MagicMock()
+    mocked_response.status_code = status.HTTP_200_OK
+    mocked_response.json.return_value = {'score': 701}
+
+    def post(*args: Any, **kwargs: Any) -> Any:  # noqa: WPS430
+        if kwargs['timeout'] == services.session_pool.timeout:
+            return mocked_response
+        time.sleep(0.2)
+        raise requests.ReadTimeout('read timed out')
+
+    mocked_request = mocker.patch.object(services.session_pool, 'post', side_effect=post)
+
+    def request(deadline: Any) -> Any:  # noqa: WPS430
+        try:
+            return services.ScoreService().request(
+                request_data={'cpf': '72456336062'},
+                deadline=deadline,
+            )
+        except exceptions.APIException as exception:
+            return str(exception)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(request, time.monotonic() + 0.1)
+        time.sleep(0.05)
+        waiter = executor.submit(request, None)
+
+    assert 'Unable to reach server' in leader.result()
+    assert waiter.result() == {'score': 701}
+    assert mocked_request.call_count == 2
+
+
+class FakeScoreHandler(BaseHTTPRequestHandler):
+    """Fake score api that answers after a delay and records each cpf requested.
+    """
+
+    calls: List[str] = []
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Answers a score request, cpfs ending with 0 fail with a server error.
+        """
+        cpf = json.loads(self.rfile.read(int(self.headers['content-length'])))['cpf']
+        self.calls.append(cpf)
+        time.sleep(0.05)
+        status_code, body = (500, {}) if cpf.endswith('0') else (200, {'score': int(cpf[-3:])})
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args: Any) -> None:
+        """Keeps test output clean.
+
+        :param args: log arguments
+        """
+
+
+@pytest.fixture()
+def fake_score_api(settings: Any) -> Generator:
+    """Fixture that serves FakeScoreHandler on a local port.
+
+    :param settings: django settings fixture
+    :yields: the list of cpfs requested
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeScoreHandler)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.EXTERNAL_API_URL = 'http://127.0.0.1:{0}'.format(server.server_port)
+    settings.EXTERNAL_API_TOKEN = 'token'
+    FakeScoreHandler.calls = []
+    yield FakeScoreHandler.calls
+    server.shutdown()
+    server.server_close()
+    services.session_pool.close()
+
+
+def test_batch_score_service_should_dispatch_each_cpf_once(  # noqa: WPS118
+    fake_score_api: List[str],
+    settings: Any,
+) -> None:
+    """Test if concurrent requests are batched, each cpf requested once in parallel.
+
+    :param fake_score_api: fixture with the cpfs requested to a fake score api
+    :param settings: django settings fixture
+    """
+    settings.EXTERNAL_API_SCORE_BATCH_WAIT = 0.2
+    settings.EXTERNAL_API_SCORE_BATCH_SIZE = 100
+    cpfs = ['72456336060', '26443567099', '11144477735', '52998224725'] * 3
+    metrics = services.score_batcher.metrics()
+
+    def request(cpf: str) -> Any:  # noqa: WPS430
+        try:
+            return services.BatchScoreService().request(request_data={'cpf': cpf})
+        except exceptions.APIException as exception:
+            return str(exception)
+
+    with ThreadPoolExecutor(max_workers=len(cpfs)) as executor:
+        outcomes = list(executor.map(request, cpfs))
+
+    assert sorted(fake_score_api) == sorted(set(cpfs))
+    assert outcomes[:4] == [
+        'Unexpected response from server', {'score': 99}, {'score': 735}, {'score': 725},
+    ]
+    assert outcomes == outcomes[:4] * 3
+    assert services.score_batcher.metrics()['batches'] == metrics['batches'] + 1
+
+
+def test_batch_score_service_should_raise_any_upstream_error(  # noqa: WPS118
+    mocker: MockerFixture,
+    settings: Any,
+) -> None:
+    """Test if errors other than APIException reach every caller of the batch.
+
+    :param mocker: fixture that contains Mock utility
+    :param settings: django settings fixture
+    """
+    settings.EXTERNAL_API_SCORE_BATCH_WAIT = 0.05
+    mocker.patch.object(services.ScoreService, 'request', side_effect=ValueError('not json'))
+
+    with pytest.raises(ValueError, match='not json'):
+        services.BatchScoreService().request(request_data={'cpf': '72456336062'})
+
+
+def test_batch_score_service_should_bound_the_wait(  # noqa: WPS118
+    mocker: MockerFixture,
+    settings: Any,
+) -> None:
+    """Test if callers give up on a dispatched request that never completes.
+
+    :param mocker: fixture that contains Mock utility
+    :param settings: django settings fixture
+    """
+    settings.EXTERNAL_API_SCORE_BATCH_WAIT = 0.05
+    mocker.patch.object(services.MicroBatcher, '_get_result_timeout', return_value=0.1)
+    mocker.patch.object(services.MicroBatcher, '_fetch')
+
+    with pytest.raises(exceptions.APIException, match='Timed out waiting for score batch'):
+        services.BatchScoreService().request(request_data={'cpf': '72456336062'})
+
+
+def test_batch_score_service_should_cut_the_window_to_deadline(  # noqa: WPS118
+    mocker: MockerFixture,
+    settings: Any,
+) -> None:
+    """Test if a leader with a deadline does not wait the batch window past it.
+
+    :param mocker: fixture that contains Mock utility
+    :param settings: django settings fixture
+    """
+    settings.EXTERNAL_API_SCORE_BATCH_WAIT = 5
+    mocker.patch.object(services.MicroBatcher, '_fetch')
+    started = time.monotonic()
+    with pytest.raises(exceptions.APIException, match='Timed out waiting for score batch'):
+        services.BatchScoreService().request(
+            request_data={'cpf': '72456336062'},
+            deadline=started + 0.1,
+        )
+
+    assert time.monotonic() - started < 1
@@ -0,0 +1,99 @@
+"""Test tasks.
+"""
+from datetime import timedelta
+from typing import Any, Tuple
+
+import pytest
+from django.utils import timezone
+from pytest_mock.plugin import MockerFixture
+
+from api import tasks
+from api.logic import APIException, ScoreService
+from api.models import Loan
+
+
+@pytest.mark.django_db()
+def test_fused_pipeline_should_resume_on_api_exception(  # noqa: WPS118
+    loans: Tuple,
+    mocker: MockerFixture,
+    settings: Any,
+) -> None:
+    """Test if fused pipeline hands the loan to per-policy tasks on api errors.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    :param settings: django settings fixture
+    """
+    settings.CREDIT_ANALYSIS_PIPELINE = 'fused'
+    loan_id = str(loans[-1].id)
+    mocker.patch.object(ScoreService, 'request', side_effect=APIException('A'))
+    mocked_resume = mocker.patch('api.tasks.resume_credit_analysis')
+    tasks.send_to_credit_analysis(loan_id)
+
+    mocked_resume.assert_called_once_with(loan_id, 'processing_score')
+
+
+@pytest.mark.django_db()
+def test_requeue_stuck_loans_should_resume_only_stale_loans(
+    loans: Tuple,
+    mocker: MockerFixture,
+) -> None:
+    """Test if loans stuck on age are sent as an age batch, up to a limit.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    """
+    stale_loans = loans[:3]
+    Loan.objects.filter(pk__in=[loan.id for loan in stale_loans]).update(
+        created_at=timezone.now() - timedelta(hours=2),
+    )
+    mocked_batch = mocker.patch.object(tasks.age_policy_batch, 'apply_async')
+    requeued = tasks.requeue_stuck_loans(
+        stuck_after=3600,
+        batch_size=2,
+        batch_interval=0,
+        max_loans=2,
+    )
+
+    assert requeued == 2
+    mocked_batch.assert_called_once_with(([mocker.ANY, mocker.ANY],), producer=mocker.ANY)
+    assert set(mocked_batch.call_args.args[0][0]) < {str(loan.id) for loan in stale_loans}
+
+
+@pytest.mark.parametrize(('retries', 'upper_bound'), [(0, 5), (3, 40), (20, 600)])
+def test_get_retry_countdown_should_grow_up_to_max(
+    settings: Any,
+    retries: int,
+    upper_bound: float,
+) -> None:
+    """Test if retry countdown is jittered under an exponential, capped, bound.
+
+    :param settings: django settings fixture
+    :param retries: retries already done
+    :param upper_bound: expected maximum countdown
+    """
+    settings.POLICY_RETRY_BACKOFF = 5
+    settings.POLICY_RETRY_BACKOFF_MAX = 600
+    countdowns = [tasks.get_retry_countdown(retries) for _ in range(50)]
+
+    assert all(0 <= countdown <= upper_bound for countdown in countdowns)
+
+
+@pytest.mark.django_db()
+def test_send_many_should_batch_age_and_forward_passed_loans(  # noqa: WPS118
+    loans: Tuple,
+    mocker: MockerFixture,
+) -> None:
+    """Test if many loans go through one age batch and only passed ones go on.
+
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    """
+    mocked_pipeline = mocker.patch('api.tasks.get_external_policies_pipeline')
+    batch_spy = mocker.spy(tasks.logic, 'start_age_policies')
+    tasks.send_many_to_credit_analysis(str(loan.id) for loan in loans)
+
+    assert batch_spy.call_count == 1
+    assert sorted(call.args[0] for call in mocked_pipeline.call_args_list) == sorted(
+        str(loan.id) for loan in loans if loan.birthdate.year != 2020
+    )
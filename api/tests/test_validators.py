@@ -0,0 +1,33 @@
+"""Test of api.validators.
+"""
+import pytest
+from django.core.exceptions import ValidationError
+
+from api.validators import validate_cpf
+
+
+@pytest.mark.parametrize('cpf_number', ['26443567099', '264.435.670-99', '72456336062'])
+def test_validate_cpf_should_accept_valid_cpf(cpf_number: str) -> None:
+    """Test if validate_cpf accepts cpfs with valid check digits, masked or not.
+
+    :param cpf_number: a valid cpf
+    """
+    assert validate_cpf(cpf_number)
+
+
+@pytest.mark.parametrize('cpf_number', [
+    '26443567098',
+    '11111111111',
+    '2644356709',
+    '264435670990',
+    '2644356709a',
+    '2644356709９',
+    '',
+])
+def test_validate_cpf_should_refuse_invalid_cpf(cpf_number: str) -> None:
+    """Test if validate_cpf refuses wrong check digits, repeated digits and bad formats.
+
+    :param cpf_number: an invalid cpf
+    """
+    with pytest.raises(ValidationError, match='Invalid CPF'):
+        validate_cpf(cpf_number)
@@ -1,13 +1,17 @@
 """Test Views.
 """
+import json
 from decimal import Decimal
+from typing import Any, Callable, Tuple
 from uuid import UUID
 
 import pytest
+from asgiref.sync import sync_to_async
 from django.test.client import Client
 from pytest_mock.plugin import MockerFixture
 from rest_framework import status
 
+from api import logic
 from api.logic import (
     CommitmentService,
     ScoreService,
@@ -57,15 +61,284 @@ def test_loan_detail_view_get_should_retrieve_201(  # noqa: WPS
     :param client: django test client
     """
     loan_id = 'e0257542-0795-409e-b6b5-80dce591aa32'
-    mocked_loan = mocker.MagicMock()
-    mocked_loan.id = UUID(loan_id)  # noqa: WPS125
-    mocked_loan.status = 'completed'
-    mocked_loan.result = 'approved'  # noqa: WPS110
-    mocked_loan.refused_policy = None
-    mocked_loan.proposal.amount = Decimal('1000')
-    mocked_loan.proposal.terms = 6
-    mocked_get_loan = mocker.patch('api.views.logic.get_loan', return_value=mocked_loan)
+    loan_detail = {
+        'id': UUID(loan_id),
+        'status': 'completed',
+        'result': 'approved',
+        'refused_policy': None,
+        'amount': Decimal('1000'),
+        'terms': 6,
+    }
+    mocked_get_loan_detail = mocker.patch(
+        'api.views.logic.get_loan_detail',
+        return_value=loan_detail,
+    )
     response = client.get('/api/v1/loan/{0}'.format(loan_id))
-    mocked_get_loan.assert_called_once_with(loan_id=loan_id)
+    mocked_get_loan_detail.assert_called_once_with(loan_id=UUID(loan_id))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['terms'] == 6
+
+
+@pytest.mark.django_db()
+def test_loan_detail_view_get_should_use_single_query(  # noqa: WPS
+    client: Client,
+    loans: Tuple,
+    django_assert_num_queries: Callable,
+) -> None:
+    """Test if loan detail view get retrieves a loan without proposal in one query.
+
+    :param client: django test client
+    :param loans: a fixture that contains a immutable list of loans
+    :param django_assert_num_queries: fixture that counts queries
+    """
+    with django_assert_num_queries(1):
+        response = client.get('/api/v1/loan/{0}'.format(loans[0].id))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['status'] == 'processing'
+    assert response.json()['terms'] is None
+
+
+@pytest.mark.django_db()
+def test_loan_detail_view_get_should_retrieve_404(client: Client) -> None:  # noqa: WPS
+    """Test if loan detail view get retrieves 404 for unknown or invalid ids.
+
+    :param client: django test client
+    """
+    unknown = client.get('/api/v1/loan/e0257542-0795-409e-b6b5-80dce591aa32')
+    invalid = client.get('/api/v1/loan/invalid')
+
+    assert unknown.status_code == status.HTTP_404_NOT_FOUND
+    assert invalid.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db()
+def test_loan_require_view_post_sync_should_retrieve_decision(  # noqa: WPS
+    client: Client,
+    mocker: MockerFixture,
+    interests: str,
+) -> None:
+    """Test if loan require view post in sync mode retrieves the decision.
+
+    :param client: django test client
+    :param mocker: fixture that contains Mock utility
+    :param interests: fixturar that have interest rate
+    """
+    request_data = {
+        'name': 'Some Name',
+        'cpf': '55822477348',
+        'birthdate': '1990-01-01',
+        'amount': Decimal('1000'),
+        'terms': 6,
+        'income': Decimal('1000'),
+    }
+    mocker.patch.object(ScoreService, 'request', return_value={'score': 701})
+    mocker.patch.object(
+        CommitmentService,
+        'request',
+        return_value={'commitment': Decimal('0.1')},
+    )
+    mocked_send = mocker.patch('api.views.send_to_credit_analysis')
+    response = client.post('/api/v1/loan?sync=true', request_data)
+
+    mocked_send.assert_not_called()
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()['status'] == 'completed'
+    assert response.json()['result'] == 'approved'
+    assert response.json()['terms'] == 6
+    assert 'interests' == interests
+
+
+@pytest.mark.django_db()
+def test_loan_require_view_post_sync_should_fallback_when_budget_exceeded(  # noqa: WPS
+    client: Client,
+    mocker: MockerFixture,
+    settings: Any,
+) -> None:
+    """Test if loan require view post falls back to celery after the budget.
+
+    :param client: django test client
+    :param mocker: fixture that contains Mock utility
+    :param settings: django settings fixture
+    """
+    settings.LOAN_SYNC_ANALYSIS = True
+    settings.LOAN_SYNC_ANALYSIS_BUDGET = 0
+    request_data = {
+        'name': 'Some Name',
+        'cpf': '55822477348',
+        'birthdate': '1990-01-01',
+        'amount': Decimal('1000'),
+        'terms': 6,
+        'income': Decimal('1000'),
+    }
+    mocked_score = mocker.patch.object(ScoreService, 'request')
+    mocked_resume = mocker.patch('api.tasks.resume_credit_analysis')
+    response = client.post('/api/v1/loan', request_data)
+
+    mocked_score.assert_not_called()
+    mocked_resume.assert_called_once_with(response.json()['id'], 'processing_score')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert list(response.json()) == ['id']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_loan_status_view_should_wait_for_completion(  # noqa: WPS
+    client: Client,
+    loans: Tuple,
+    mocker: MockerFixture,
+) -> None:
+    """Test if loan status view retrieves the loan completed while waiting.
+
+    :param client: django test client
+    :param loans: a fixture that contains a immutable list of loans
+    :param mocker: fixture that contains Mock utility
+    """
+    loan = loans[0]
+
+    async def complete_loan(loan_id: UUID, timeout: float, is_completed: Any) -> None:  # noqa
+        assert not await is_completed()
+        await sync_to_async(logic.run_age_policy, thread_sensitive=True)(loan)
+
+    mocked_wait = mocker.patch('api.views.wait_loan_completed', side_effect=complete_loan)
+    response = client.get('/api/v1/loan/{0}/status?wait=90'.format(loan.id))
+
+    assert mocked_wait.call_args[0][:2] == (loan.id, 30)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['status'] == 'completed'
+    assert response.json()['refused_policy'] == 'age'
+
+
+@pytest.mark.django_db()
+def test_loan_status_view_should_retrieve_404(client: Client) -> None:  # noqa: WPS
+    """Test if loan status view retrieves 404 for unknown ids.
+
+    :param client: django test client
+    """
+    response = client.get('/api/v1/loan/e0257542-0795-409e-b6b5-80dce591aa32/status')
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db()
+def test_loan_bulk_view_post_should_retrieve_results(  # noqa: WPS
+    client: Client,
+    mocker: MockerFixture,
+) -> None:
+    """Test if loan bulk view post creates valid items and reports invalid ones.
+
+    :param client: django test client
+    :param mocker: fixture that contains Mock utility
+    """
+    valid_item = {
+        'name': 'Some Name',
+        'cpf': '55822477348',
+        'birthdate': '1990-01-01',
+        'amount': '1000',
+        'terms': 6,
+        'income': '1000',
+    }
+    invalid_item = dict(valid_item, cpf='11111111112')
+    mocked_send = mocker.patch('api.views.send_many_to_credit_analysis')
+    response = client.post(
+        '/api/v1/loans/bulk',
+        json.dumps([valid_item, invalid_item, valid_item]),
+        content_type='application/json',
+    )
+    results = response.json()['results']
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [loan_result['index'] for loan_result in results] == [0, 1, 2]
+    assert 'id' in results[0] and 'id' in results[2]
+    assert 'Invalid CPF' in results[1]['errors'][0]
+    assert list(mocked_send.call_args[0][0]) == [results[0]['id'], results[2]['id']]
+    assert logic.get_loan(UUID(results[2]['id'])).amount == Decimal('1000')
+
+
+@pytest.mark.django_db()
+def test_loan_bulk_view_post_should_accept_ndjson(  # noqa: WPS
+    client: Client,
+    mocker: MockerFixture,
+) -> None:
+    """Test if loan bulk view post accepts a NDJSON body.
+
+    :param client: django test client
+    :param mocker: fixture that contains Mock utility
+    """
+    item = {
+        'name': 'Some Name',
+        'cpf': '55822477348',
+        'birthdate': '1990-01-01',
+        'amount': 1000,
+        'terms': 6,
+        'income': 1000,
+    }
+    mocker.patch('api.views.send_many_to_credit_analysis')
+    response = client.post(
+        '/api/v1/loans/bulk',
+        '{0}\n{0}\n'.format(json.dumps(item)),
+        content_type='application/x-ndjson',
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.json()['results']) == 2
+
+
+@pytest.mark.django_db()
+def test_loan_export_view_get_should_stream_ndjson(  # noqa: WPS
+    admin_client: Client,
+    policies: Tuple,
+) -> None:
+    """Test if loan export view streams loans with their policies as NDJSON.
+
+    :param admin_client: django test client logged in as a superuser
+    :param policies: a fixture that contains a immutable list of policies
+    """
+    response = admin_client.get('/api/v1/loans/export?status=processing&created_from=2000-01-01')
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+    loan_row = next(row for row in rows if row['id'] == str(policies[0].loan.id))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(rows) == 4
+    assert [policy['name'] for policy in loan_row['policies']] == ['age', 'score', 'commitment']
+    assert loan_row['proposal'] is None
+
+
+@pytest.mark.django_db()
+def test_loan_export_view_get_should_stream_csv(  # noqa: WPS
+    admin_client: Client,
+    loans: Tuple,
+) -> None:
+    """Test if loan export view streams loans as CSV and filters them.
+
+    :param admin_client: django test client logged in as a superuser
+    :param loans: a fixture that contains a immutable list of loans
+    """
+    response = admin_client.get('/api/v1/loans/export?output=csv&status=completed')
+    lines = b''.join(response.streaming_content).decode().splitlines()
 
     assert response.status_code == status.HTTP_200_OK
+    assert response['content-type'] == 'text/csv'
+    assert lines[0].startswith('id,name,cpf')
+    assert len(lines) == 1
+
+
+@pytest.mark.django_db()
+def test_loan_export_view_get_should_refuse_non_staff(  # noqa: WPS
+    client: Client,
+    django_user_model: Any,
+    loans: Tuple,
+) -> None:
+    """Test if loan export view refuses anonymous and non staff users.
+
+    :param client: django test client
+    :param django_user_model: the user model
+    :param loans: a fixture that contains a immutable list of loans
+    """
+    anonymous_response = client.get('/api/v1/loans/export')
+    client.force_login(django_user_model.objects.create_user(username='user', password='pass'))
+    user_response = client.get('/api/v1/loans/export')
+
+    assert anonymous_response.status_code == status.HTTP_403_FORBIDDEN
+    assert user_response.status_code == status.HTTP_403_FORBIDDEN
+    assert len(loans) == 4
@@ -3,11 +3,20 @@
 from django.urls import path
 from rest_framework.urlpatterns import format_suffix_patterns
 
-from api.views import LoanDetailView, LoanRequireView
+from api.views import (
+    LoanBulkView,
+    LoanDetailView,
+    LoanExportView,
+    LoanRequireView,
+    loan_status_view,
+)
 
 urlpatterns = [
     path('/loan', LoanRequireView.as_view()),
+    path('/loans/bulk', LoanBulkView.as_view()),
+    path('/loans/export', LoanExportView.as_view()),
     path('/loan/<str:id>', LoanDetailView.as_view()),
+    path('/loan/<str:id>/status', loan_status_view),
 ]
 
 urlpatterns = format_suffix_patterns(urlpatterns)
@@ -1,23 +1,33 @@
 """Validators.
 """
-from datetime import datetime
+from datetime import date
 from decimal import Decimal
+from typing import Optional
 
 from django.core.exceptions import ValidationError
-from validate_docbr import CPF
 
 from api.consts import MAX_AMOUNT, MIN_AMOUNT, MIN_SCORE, MINIMUM_AGE
-from api.helpers import calculate_age_by_date, convert_str_date_to_object
+from api.helpers import calculate_age_by_date, convert_str_date_to_object, is_valid_cpf
 
 
-def validate_age(birthdate: datetime) -> bool:
+def validate_age(birthdate: date, today: Optional[date] = None) -> bool:
     """Validate age according to birthdate.
 
     :param birthdate: a date object for age calculation.
+    :param today: the reference date of a batch, current date when None
+    :raises ValidationError: exception excepted when age is not on minimum rule.
+    :return: always return True
+    """
+    return validate_minimum_age(calculate_age_by_date(birthdate, today=today))
+
+
+def validate_minimum_age(age: int) -> bool:
+    """Validate an age already calculated, as done for batches of loans.
+
+    :param age: age in years
     :raises ValidationError: exception excepted when age is not on minimum rule.
     :return: always return True
     """
-    age = calculate_age_by_date(birthdate)
     if age < MINIMUM_AGE:
         raise ValidationError('The age {0} is lower than {1} years'.format(age, MINIMUM_AGE))
 
@@ -61,8 +71,7 @@ def validate_cpf(cpf_number: str) -> bool:
     :raises ValidationError: exception expected when cpf is not valid
     :return: always return True
     """
-    cpf = CPF()
-    if not cpf.validate(cpf_number):
+    if not is_valid_cpf(cpf_number):
         raise ValidationError('Invalid CPF')
 
     return True
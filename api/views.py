@@ -1,15 +1,81 @@
 """Api views.
 """
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.request import HttpRequest
 from rest_framework.response import Response
-from api.tasks import send_to_credit_analysis
+
+from api.tasks import (
+    run_inline_credit_analysis,
+    send_many_to_credit_analysis,
+    send_to_credit_analysis,
+)
 
 from api import logic
 from api.decorators import validate_request_data
+from api.enums import LoanStatus
+from api.exports import EXPORT_FORMATS, get_export_filters, iter_csv, iter_ndjson
+from api.notifications import wait_loan_completed
 from api.schemas import PostLoanRequest
 
+get_loan_detail = sync_to_async(logic.get_loan_detail, thread_sensitive=True)
+
+
+def _is_sync_requested(request: HttpRequest) -> bool:
+    sync = request.query_params.get('sync')
+    if sync is None:
+        return settings.LOAN_SYNC_ANALYSIS
+
+    return sync.lower() in {'1', 'true'}
+
+
+def _get_wait(request: HttpRequest) -> float:
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        return 0
+
+    return max(0, min(wait, settings.LOAN_STATUS_MAX_WAIT))
+
+
+def _get_bulk_items(request: HttpRequest) -> List[Any]:
+    if request.content_type == 'application/x-ndjson':
+        return [json.loads(line) for line in request.body.decode().splitlines() if line.strip()]
+
+    return request.data
+
+
+def _validate_bulk_item(item: Any) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    if not isinstance(item, dict):
+        return None, ['Item should be an object']
+
+    try:
+        return PostLoanRequest.validate(item), []
+    except ValidationError as exception:
+        return None, exception.messages
+
+
+def _get_loan_data(loan: Any) -> Dict[str, Any]:
+    proposal = getattr(loan, 'proposal', None)
+    return {
+        'id': loan.id,
+        'status': loan.status,
+        'result': loan.result,
+        'refused_policy': loan.refused_policy,
+        'amount': None if not proposal else proposal.amount,  # noqa: WPS504
+        'terms': None if not proposal else proposal.terms,   # noqa: WPS504
+    }
+
 
 class LoanRequireView(APIView):
     """Loan View.
@@ -19,17 +85,111 @@ class LoanRequireView(APIView):
     def post(self, request: HttpRequest) -> Response:
         """Endpoint that creates loan.
 
+        With ``?sync=true`` (or ``LOAN_SYNC_ANALYSIS``) the analysis runs
+        inline and a completed loan is returned with its decision.
+
         :param request: A request object
         :return: A response object
         """
-        loan = logic.create_loan(dict(request.data.items()))
-        send_to_credit_analysis(loan_id=str(loan.id))
+        loan = logic.create_loan(request.validated_data)
+        if _is_sync_requested(request):
+            run_inline_credit_analysis(loan)
+            if loan.status == LoanStatus.completed.value:
+                return Response(data=_get_loan_data(loan), status=status.HTTP_201_CREATED)
+        else:
+            send_to_credit_analysis(loan_id=str(loan.id))
+
         return Response(
             data={'id': loan.id},
             status=status.HTTP_201_CREATED,
         )
 
 
+class LoanBulkView(APIView):
+    """Loan Bulk View.
+    """
+
+    def post(self, request: HttpRequest) -> Response:
+        """Endpoint that creates many loans from a JSON array or NDJSON body.
+
+        Valid items are inserted in batches and sent to credit analysis over
+        one broker connection, invalid ones are reported by index.
+
+        :param request: A request object
+        :return: A response object
+        """
+        try:
+            items = _get_bulk_items(request)
+        except ValueError as exception:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={'errors': [str(exception)]})
+
+        if not isinstance(items, list):
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={'errors': ['Body should be a list of loans']},
+            )
+        if len(items) > settings.LOAN_BULK_MAX_ITEMS:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={'errors': ['At most {0} loans per request'.format(
+                    settings.LOAN_BULK_MAX_ITEMS,
+                )]},
+            )
+
+        results: List[Dict[str, Any]] = []
+        valid_items: List[Dict] = []
+        for index, item in enumerate(items):
+            loan_data, errors = _validate_bulk_item(item)
+            results.append({'index': index, 'errors': errors} if errors else {'index': index})
+            if not errors:
+                valid_items.append(loan_data)
+
+        loans = logic.create_loans(valid_items)
+        send_many_to_credit_analysis(str(loan.id) for loan in loans)
+        loan_ids = iter(loans)
+        for loan_result in results:
+            if 'errors' not in loan_result:
+                loan_result['id'] = next(loan_ids).id
+
+        return Response(data={'results': results}, status=status.HTTP_201_CREATED)
+
+
+class LoanExportView(APIView):
+    """Loan Export View, restricted to staff users as it exposes personal data.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: HttpRequest) -> StreamingHttpResponse:
+        """Endpoint that streams loans with their policies and proposal.
+
+        Accepts ``output`` (ndjson or csv, ``format`` is taken by DRF), ``status``, ``result``, ``state``,
+        ``created_from`` and ``created_to`` (Y-m-d) query parameters.
+
+        :param request: A request object
+        :return: A streaming response object
+        """
+        export_format = request.query_params.get('output', EXPORT_FORMATS[0])
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={'errors': ['Output should be one of {0}'.format(EXPORT_FORMATS)]},
+            )
+        try:
+            filters = get_export_filters(request.query_params)
+        except ValueError:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={'errors': ['Invalid date format, it shoulds Y-m-d format.']},
+            )
+
+        rows = logic.iter_loans_export(filters)
+        if export_format == 'csv':
+            return StreamingHttpResponse(iter_csv(rows), content_type='text/csv')
+
+        return StreamingHttpResponse(iter_ndjson(rows), content_type='application/x-ndjson')
+
+
 class LoanDetailView(APIView):
     """Loan Detail View.
     """
@@ -42,18 +202,39 @@ class LoanDetailView(APIView):
         :return: A response object
         """
         try:
-            loan = logic.get_loan(loan_id=id)
-        except Exception:
-            Response(status=status.HTTP_404_NOT_FOUND)
+            loan_detail = logic.get_loan_detail(loan_id=UUID(id))
+        except (ValueError, ObjectDoesNotExist):
+            return Response(status=status.HTTP_404_NOT_FOUND)
 
-        return Response(
-            data={
-                'id': loan.id,
-                'status': loan.status,
-                'result': loan.result,
-                'refused_policy': loan.refused_policy,
-                'amount': None if not loan.proposal else loan.proposal.amount,  # noqa: WPS504
-                'terms': None if not loan.proposal else loan.proposal.terms,   # noqa: WPS504
-            },
-            status=status.HTTP_200_OK,
-        )
+        return Response(data=loan_detail, status=status.HTTP_200_OK)
+
+
+async def loan_status_view(request: HttpRequest, id: str) -> JsonResponse:  # noqa: WPS125
+    """Long-poll endpoint that gets loan details once it is completed.
+
+    ``?wait=<seconds>`` holds the request until the loan is completed or the
+    wait is over, without holding a worker thread while idle. Should be
+    served by the ASGI application.
+
+    :param request: A request object
+    :param id: A string that contains loan id
+    :return: A response object
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        loan_id = UUID(id)
+        loan_detail = await get_loan_detail(loan_id=loan_id)
+    except (ValueError, ObjectDoesNotExist):
+        return JsonResponse({}, status=status.HTTP_404_NOT_FOUND)
+
+    if loan_detail['status'] != LoanStatus.completed.value:
+        async def is_completed() -> bool:  # noqa: WPS430
+            current = await get_loan_detail(loan_id=loan_id)
+            return current['status'] == LoanStatus.completed.value
+
+        await wait_loan_completed(loan_id, _get_wait(request), is_completed)
+        loan_detail = await get_loan_detail(loan_id=loan_id)
+
+    return JsonResponse(loan_detail, encoder=DjangoJSONEncoder)
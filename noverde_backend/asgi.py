@@ -3,6 +3,10 @@ ASGI config for noverde_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The loan status long-poll (``/api/v1/loan/<id>/status?wait=<seconds>``) is an
+async view, so idle waits only cost a coroutine when served from here, e.g.
+``uvicorn noverde_backend.asgi:application``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
 """
@@ -37,7 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'api',
+    'api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
@@ -125,6 +125,29 @@ STATIC_URL = '/static/'
 
 EXTERNAL_API_URL = 'https://challenge.noverde.name'
 EXTERNAL_API_TOKEN = environ.get('EXTERNAL_API_TOKEN')
+EXTERNAL_API_POOL_SIZE = int(environ.get('EXTERNAL_API_POOL_SIZE', 10))
+EXTERNAL_API_CONNECT_TIMEOUT = float(environ.get('EXTERNAL_API_CONNECT_TIMEOUT', 3.05))
+EXTERNAL_API_READ_TIMEOUT = float(environ.get('EXTERNAL_API_READ_TIMEOUT', 10))
+# response cache TTL in seconds per service, 0 disables it
+EXTERNAL_API_CACHE_TTL = {
+    'score': int(environ.get('EXTERNAL_API_SCORE_CACHE_TTL', 300)),
+    'commitment': int(environ.get('EXTERNAL_API_COMMITMENT_CACHE_TTL', 300)),
+}
+EXTERNAL_API_NEGATIVE_CACHE_TTL = int(environ.get('EXTERNAL_API_NEGATIVE_CACHE_TTL', 30))
+# seconds callers wait on a concurrent upstream call of the same service and request
+EXTERNAL_API_CACHE_LOCK_TIMEOUT = 15
+# failures within the window that open the circuit of a service, and seconds it stays open
+EXTERNAL_API_CIRCUIT_FAILURES = int(environ.get('EXTERNAL_API_CIRCUIT_FAILURES', 5))
+EXTERNAL_API_CIRCUIT_WINDOW = int(environ.get('EXTERNAL_API_CIRCUIT_WINDOW', 30))
+EXTERNAL_API_CIRCUIT_OPEN_TIMEOUT = int(environ.get('EXTERNAL_API_CIRCUIT_OPEN_TIMEOUT', 30))
+# upstream calls per second of a service across workers (0 disables), divided by one plus
+# the circuit failures of the window, and seconds to wait
+EXTERNAL_API_RATE_LIMIT = int(environ.get('EXTERNAL_API_RATE_LIMIT', 50))
+EXTERNAL_API_RATE_LIMIT_WAIT = float(environ.get('EXTERNAL_API_RATE_LIMIT_WAIT', 1))
+# seconds score requests of a process wait to be dispatched together (0 disables it), and
+# requests per batch; only worth it with threaded or green worker pools
+EXTERNAL_API_SCORE_BATCH_WAIT = float(environ.get('EXTERNAL_API_SCORE_BATCH_WAIT', 0))
+EXTERNAL_API_SCORE_BATCH_SIZE = int(environ.get('EXTERNAL_API_SCORE_BATCH_SIZE', 50))
 
 FIXTURE_DIRS = [
     path.join(BASE_DIR, 'fixtures')
@@ -148,3 +171,39 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_CACHE_BACKEND = 'django-cache'
+# policy tasks retry after a random delay up to base * 2 ** retries, capped at max seconds
+POLICY_RETRY_BACKOFF = float(environ.get('POLICY_RETRY_BACKOFF', 5))
+POLICY_RETRY_BACKOFF_MAX = float(environ.get('POLICY_RETRY_BACKOFF_MAX', 600))
+CELERY_BEAT_SCHEDULE = {
+    'sweep-stuck-loans': {
+        'task': 'sweep_stuck_loans',
+        'schedule': float(environ.get('LOAN_SWEEP_INTERVAL', 300)),
+    },
+}
+
+# chain: one task per policy; concurrent: score and commitment fetched together;
+# fused: every policy in one task, falling back to per-policy tasks on api errors
+CREDIT_ANALYSIS_PIPELINE = environ.get('CREDIT_ANALYSIS_PIPELINE', 'chain')
+
+# maximum of loans accepted by POST /loans/bulk
+LOAN_BULK_MAX_ITEMS = int(environ.get('LOAN_BULK_MAX_ITEMS', 5000))
+
+# seconds a completed loan detail is cached, processing ones are never cached
+LOAN_DETAIL_CACHE_TTL = int(environ.get('LOAN_DETAIL_CACHE_TTL', 300))
+
+# redis used to notify long-poll waiters of completed loans, empty disables it
+LOAN_STATUS_REDIS_URL = environ.get('LOAN_STATUS_REDIS_URL', 'redis://cache:6379/2')
+# upper bound of ?wait= seconds on loan status long-poll
+LOAN_STATUS_MAX_WAIT = 30
+
+# run credit analysis inside POST /loan (also enabled per request with ?sync=true)
+LOAN_SYNC_ANALYSIS = environ.get('LOAN_SYNC_ANALYSIS', 'false').lower() == 'true'
+# seconds after which the inline analysis, external requests included, gives up and goes to celery
+LOAN_SYNC_ANALYSIS_BUDGET = float(environ.get('LOAN_SYNC_ANALYSIS_BUDGET', 2))
+
+# seconds processing after which a loan is stuck, past the celery retries window
+LOAN_SWEEP_STUCK_AFTER = int(environ.get('LOAN_SWEEP_STUCK_AFTER', 3600))
+# stuck loans enqueued per batch, seconds between batches and per sweep limit
+LOAN_SWEEP_BATCH_SIZE = int(environ.get('LOAN_SWEEP_BATCH_SIZE', 100))
+LOAN_SWEEP_BATCH_INTERVAL = float(environ.get('LOAN_SWEEP_BATCH_INTERVAL', 1))
+LOAN_SWEEP_MAX_LOANS = int(environ.get('LOAN_SWEEP_MAX_LOANS', 5000))
@@ -16,3 +16,5 @@ CACHES = {
 CELERY_BROKER_URL = ''
 CELERY_RESULT_BACKEND = ''
 CELERY_TASK_ALWAYS_EAGER = True
+
+LOAN_STATUS_REDIS_URL = None
@@ -0,0 +1,54 @@
+"""Benchmark of CPF validation, validate_docbr against api.helpers.is_valid_cpf.
+
+Half of the CPFs are valid. The cold run checks distinct CPFs, the warm run
+checks each CPF twice, as a request does on schema and model validation.
+
+Usage: python scripts/benchmark_cpf.py [cpfs]
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'noverde_backend.settings_test')
+
+from validate_docbr import CPF  # noqa: E402
+
+from api.helpers import is_valid_cpf  # noqa: E402
+
+CPFS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+generator = CPF()
+NUMBERS = [
+    generator.generate() if index % 2 else '{0:011d}'.format(random.randrange(10 ** 11))
+    for index in range(CPFS)
+]
+TWICE = [number for number in NUMBERS for _ in range(2)]
+
+
+def docbr(numbers: list) -> None:
+    """Validates with a new validate_docbr object per call, as before.
+
+    :param numbers: cpfs to validate
+    """
+    for number in numbers:
+        CPF().validate(number)
+
+
+def fast(numbers: list) -> None:
+    """Validates with the checksum of api.helpers.
+
+    :param numbers: cpfs to validate
+    """
+    is_valid_cpf.cache_clear()
+    for number in numbers:
+        is_valid_cpf(number)
+
+
+if __name__ == '__main__':
+    for label, numbers in (('cold', NUMBERS), ('warm', TWICE)):
+        for name, function in (('validate_docbr', docbr), ('is_valid_cpf', fast)):
+            best = min(timeit.repeat(lambda: function(numbers), number=1, repeat=3))  # noqa: WPS430
+            print('{0} {1}: {2} checks in {3:.3f}s ({4:.2f}us/check)'.format(
+                label, name, len(numbers), best, best / len(numbers) * 1e6,
+            ))
@@ -0,0 +1,47 @@
+"""Benchmark of Loan instantiation, as done when a queryset is materialized.
+
+Usage: python scripts/benchmark_loan_init.py [rows]
+"""
+import os
+import sys
+import timeit
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'noverde_backend.settings_test')
+
+import django  # noqa: E402
+
+django.setup()
+
+from api.models import Loan  # noqa: E402
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+FIELD_NAMES = [field.attname for field in Loan._meta.concrete_fields]  # noqa: WPS437
+VALUES = {
+    'id': uuid.uuid4(),
+    'name': 'Fulano de Tal',
+    'cpf': '26443567099',
+    'birthdate': date(1990, 1, 1),
+    'amount': Decimal('1000.00'),
+    'terms': 12,
+    'income': Decimal('1000.00'),
+    'state': 'processing_age',
+    'status': 'processing',
+    'created_at': datetime(2021, 1, 1, tzinfo=timezone.utc),
+}
+ROW = tuple(VALUES.get(field_name) for field_name in FIELD_NAMES)
+
+
+def materialize() -> None:
+    """Builds ROWS loans through Model.from_db, like a queryset does.
+    """
+    for _ in range(ROWS):
+        Loan.from_db('default', FIELD_NAMES, ROW)
+
+
+if __name__ == '__main__':
+    best = min(timeit.repeat(materialize, number=1, repeat=5))
+    print('{0} Loan rows: {1:.3f}s ({2:.1f}us/row)'.format(ROWS, best, best / ROWS * 1e6))
@@ -0,0 +1,154 @@
+"""Query plans and timings of the hot loan queries on a seeded PostgreSQL.
+
+Seeds loans with their policies straight in SQL, then prints EXPLAIN ANALYZE
+and the best timing of each query used by ``api.logic`` and
+``api.state_machine``. Point POSTGRES_* at a scratch database: seeded rows
+are not removed.
+
+Usage: python scripts/benchmark_queries.py [--rows 1000000] [--skip-seed] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import timedelta
+from typing import Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'noverde_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Q, QuerySet  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from api.models import Interest, Loan, Policy  # noqa: E402
+
+SEED_LOANS_SQL = """
+INSERT INTO api_loan (
+    id, name, cpf, birthdate, amount, terms, income, score, commitment,
+    refused_policy, result, state, status, created_at
+)
+SELECT
+    md5(random()::text || i::text)::uuid,
+    'Loan ' || i,
+    lpad((i * 7919 %% 100000000000)::text, 11, '0'),
+    date '1950-01-01' + (i %% 20000),
+    1000 + i %% 4000,
+    (ARRAY[6, 9, 12])[1 + i %% 3],
+    1000 + i %% 9000,
+    CASE WHEN i %% 20 = 0 THEN NULL ELSE i %% 1000 END,
+    CASE WHEN i %% 20 = 0 THEN NULL ELSE (i %% 100) / 100.0 END,
+    CASE WHEN i %% 20 = 0 THEN NULL WHEN i %% 3 = 0 THEN 'score' END,
+    CASE WHEN i %% 20 = 0 THEN NULL WHEN i %% 3 = 0 THEN 'refused' ELSE 'approved' END,
+    CASE
+        WHEN i %% 20 = 0 THEN (
+            ARRAY['processing_age', 'processing_score', 'processing_commitment']
+        )[1 + i %% 3]
+        WHEN i %% 3 = 0 THEN 'refused'
+        ELSE 'approved'
+    END,
+    CASE WHEN i %% 20 = 0 THEN 'processing' ELSE 'completed' END,
+    now() - (i * interval '30 seconds')
+FROM generate_series(1, %s) AS i
+"""
+SEED_POLICIES_SQL = """
+INSERT INTO api_policy (name, failed, response, loan_id)
+SELECT
+    policy.name,
+    loan.result = 'refused' AND policy.name = loan.refused_policy,
+    '{}',
+    loan.id
+FROM api_loan AS loan
+CROSS JOIN (VALUES ('age', 1), ('score', 2), ('commitment', 3)) AS policy (name, position)
+WHERE
+    loan.status = 'completed'
+    AND (loan.result = 'approved' OR policy.position <= 2)
+"""
+
+
+def seed(rows: int) -> None:
+    """Seeds rows loans, their policies and refreshes planner statistics.
+
+    :param rows: number of loans
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(SEED_LOANS_SQL, [rows])
+        cursor.execute(SEED_POLICIES_SQL)
+        cursor.execute('ANALYZE api_loan, api_policy, api_interest')
+
+
+def get_hot_queries() -> Tuple[Tuple[str, Callable[[], QuerySet]], ...]:
+    """Get the hot queries, each built from a sample of the seeded rows.
+
+    :return: pairs of label and queryset factory
+    """
+    sample = Loan.objects.filter(status='completed').values('id', 'cpf').first()
+    chunk_ids = list(Loan.objects.values_list('id', flat=True)[:2000])
+    stale_before = timezone.now() - timedelta(minutes=10)
+    in_flight = Loan.objects.filter(status='processing', state='processing_score')
+    last_seen = in_flight.order_by('created_at', 'id').values('id', 'created_at').first()
+
+    return (
+        ('interest index load', lambda: Interest.objects.values_list(
+            'terms', 'min_score', 'max_score', 'percentage',
+        )),
+        ('interest rate lookup', lambda: Interest.objects.filter(
+            terms=12, min_score__lte=500, max_score__gte=500,
+        ).order_by('percentage')),
+        ('loan by pk', lambda: Loan.objects.filter(pk=sample['id'])),
+        ('loan detail', lambda: Loan.objects.filter(pk=sample['id']).values(
+            'id', 'status', 'result', 'refused_policy', 'proposal__amount', 'proposal__terms',
+        )),
+        ('loans by cpf', lambda: Loan.objects.filter(cpf=sample['cpf'])),
+        ('has passed policy', lambda: Policy.objects.filter(
+            loan_id=sample['id'], name='score', failed=False,
+        )[:1]),
+        ('in-flight loans by state', lambda: in_flight.filter(
+            Q(created_at__gt=last_seen['created_at'])
+            | Q(created_at=last_seen['created_at'], id__gt=last_seen['id']),
+            created_at__lt=stale_before,
+        ).order_by('created_at', 'id').values_list('id', 'created_at')[:500]),
+        ('export by status', lambda: Loan.objects.filter(
+            status='completed',
+        ).order_by('created_at').values('id', 'status', 'result')[:2000]),
+        ('export policies chunk', lambda: Policy.objects.filter(
+            loan_id__in=chunk_ids,
+        ).order_by('id').values('loan_id', 'name', 'failed')),
+    )
+
+
+def main() -> None:
+    """Seeds, explains and times the hot queries.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit('PostgreSQL is required, got {0}'.format(connection.vendor))
+
+    if not args.skip_seed:
+        started = timeit.default_timer()
+        seed(args.rows)
+        print('Seeded {0} loans in {1:.1f}s'.format(
+            args.rows, timeit.default_timer() - started,
+        ))
+
+    for label, get_queryset in get_hot_queries():
+        best = min(timeit.repeat(
+            lambda: list(get_queryset()),  # noqa: WPS430
+            number=1,
+            repeat=args.repeat,
+        ))
+        print('\n== {0}: {1:.3f}ms'.format(label, best * 1e3))
+        print(get_queryset().explain(analyze=True, buffers=True))
+
+
+if __name__ == '__main__':
+    main()